@@ -0,0 +1,93 @@
+"""Latensi pause/stop/keluar terhadap server lokal yang mengirim header lalu macet.
+
+    python benchmarks/cancel_latency.py [jumlah_item]
+
+Semua worker sedang blok di read saat perintah dikirim; tanpa shutdown socket dari
+thread pemanggil mereka baru kembali setelah timeout read 30 s. Gagal (exit 1) jika
+pause, stop, atau close_store melewati CANCEL_BOUND_SECONDS, atau jika pause yang
+langsung di-resume (klik ganda) membuat item ERROR alih-alih tersambung lagi.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QSettings
+from PySide6.QtWidgets import QApplication
+
+import macan_download14 as m
+from local_server import LocalServer
+
+CANCEL_BOUND_SECONDS = 1.0
+CONNECT_TIMEOUT_SECONDS = 20
+
+def wait_until(app, condition, timeout):
+    """Proses event loop sampai `condition()` benar; returns detik yang dibutuhkan, atau None jika timeout."""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout: return None
+        app.processEvents()
+        time.sleep(0.001)
+    return time.perf_counter() - started
+
+def main(count):
+    app = QApplication(sys.argv)
+    workdir = tempfile.mkdtemp(prefix="macan-cancel-")
+    settings = QSettings(os.path.join(workdir, "settings.ini"), QSettings.IniFormat)
+    settings.setValue("max_concurrent_downloads", count)
+    manager = m.DownloadManager(settings)
+    failures = []
+
+    def workers(): return [worker for _, worker in manager.worker_threads.values()]
+    def all_stalled(): # Setiap item punya worker, dan semuanya sedang blok membaca body
+        return (len(manager.active_downloads) == count and all(task.get('counters') is not None for task in manager.active_downloads.values())
+                and workers() and all(worker.response is not None and not worker.parked for worker in workers()))
+
+    def measure(label, action, done):
+        if wait_until(app, all_stalled, CONNECT_TIMEOUT_SECONDS) is None:
+            failures.append(f"{label}: workers did not connect within {CONNECT_TIMEOUT_SECONDS} s")
+            return
+        stalled = len(workers())
+        started = time.perf_counter()
+        action()
+        elapsed = wait_until(app, done, CANCEL_BOUND_SECONDS * 10)
+        total = time.perf_counter() - started
+        print(f"  {label:<12} {stalled} stalled workers -> {total * 1000:7.1f} ms")
+        if elapsed is None or total > CANCEL_BOUND_SECONDS:
+            failures.append(f"{label} took {total:.2f} s (bound {CANCEL_BOUND_SECONDS} s)")
+
+    with LocalServer() as base_url:
+        items = [manager.add_download(f"{base_url}/stall", os.path.join(workdir, f"{n}.bin"), "General", (1, 2, 4)[n % 3])
+                 for n in range(count)]
+        print(f"{count} items, splits 1/2/4")
+        measure("pause", lambda: [manager.control_download(item.uid, 'pause') for item in items],
+                lambda: all(worker.parked for worker in workers()))
+        for item in items: manager.control_download(item.uid, 'resume')
+
+        previous = {}
+        def toggle(): # Resume sebelum worker sempat melihat read yang diputus pause
+            previous.update((id(worker), worker.response) for worker in workers())
+            for item in items:
+                manager.control_download(item.uid, 'pause')
+                manager.control_download(item.uid, 'resume')
+        def reconnected(): # Setiap worker membuka request baru (lewat Range), atau ada item yang gagal
+            live = workers()
+            return (any(item.status == m.DownloadStatus.ERROR for item in items) or
+                    (len(live) == len(previous) and all(worker.response is not None and worker.response is not previous[id(worker)]
+                                                        for worker in live)))
+        measure("pause+resume", toggle, reconnected)
+        errors = [item.error_message for item in items if item.status != m.DownloadStatus.DOWNLOADING]
+        if errors: failures.append(f"pause+resume left {len(errors)} items not downloading: {errors[0]}")
+        measure("stop", lambda: [manager.control_download(item.uid, 'stop') for item in items],
+                lambda: not manager.worker_threads)
+        for item in items: manager.control_download(item.uid, 'retry')
+        measure("close_store", manager.close_store, lambda: True)
+
+    for failure in failures: print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 12))
@@ -0,0 +1,75 @@
+"""Cek filter status sidebar di CustomFilterProxyModel: bucket & jumlah mengikuti status tampilan.
+
+    python benchmarks/filter_proxy.py
+
+Item split yang sedang di-merge/verify tetap DOWNLOADING di DownloadStatus, tapi tabel
+menampilkannya "Finalizing"; filter "Downloading" tidak boleh ikut memuatnya. Gagal (exit 1)
+jika baris yang tersaring atau jumlah per status tidak sesuai.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QModelIndex
+from PySide6.QtWidgets import QApplication
+
+import macan_download14 as m
+
+def visible(proxy):
+    return sorted(proxy.index(row, 0).data() for row in range(proxy.rowCount(QModelIndex())))
+
+def main():
+    app = QApplication(sys.argv)
+    items = []
+    for name, status in [("a.bin", m.DownloadStatus.DOWNLOADING), ("b.bin", m.DownloadStatus.DOWNLOADING),
+                         ("c.bin", m.DownloadStatus.PAUSED), ("d.bin", m.DownloadStatus.FINISHED)]:
+        item = m.DownloadItem(f"http://127.0.0.1/{name}", f"/tmp/{name}", splits=4)
+        item.status = status
+        items.append(item)
+    archive = m.DownloadArchive()
+    archive.append_record({'uid': "archived", 'url': "http://127.0.0.1/e.bin", 'filepath': "/tmp/e.bin",
+                           'status': m.DownloadStatus.FINISHED.value, 'category': "General", 'total_size': 1,
+                           'downloaded_size': 1, 'date_added': "2025-01-02 03:04:05", 'splits': 1,
+                           'checksum_algo': "", 'expected_checksum': "", 'checksum': ""})
+    source = m.DownloadTableModel(items, archive)
+    proxy = m.CustomFilterProxyModel()
+    proxy.setSourceModel(source)
+    emitted = []
+    proxy.status_counts_changed.connect(emitted.append)
+    failures = []
+
+    def check(label, expected):
+        counts = {status: n for status, n in proxy.status_counts().items() if n}
+        want = {status: len(names) for status, names in expected.items() if names}
+        if counts != want: failures.append(f"{label}: counts {counts}, expected {want}")
+        for status, names in expected.items():
+            proxy.set_status_filter(status)
+            if visible(proxy) != sorted(names): failures.append(f"{label}: {status} shows {visible(proxy)}, expected {sorted(names)}")
+        proxy.set_status_filter("All")
+
+    check("initial", {"Downloading": ["a.bin", "b.bin"], "Finalizing": [], "Paused": ["c.bin"],
+                      "Finished": ["d.bin", "e.bin"]})
+
+    # Seperti finalize_split_download: status tetap DOWNLOADING, finalize_progress diisi
+    items[1].finalize_progress = 0
+    source.refresh_item(items[1])
+    check("merging", {"Downloading": ["a.bin"], "Finalizing": ["b.bin"], "Paused": ["c.bin"],
+                      "Finished": ["d.bin", "e.bin"]})
+    if not emitted or emitted[-1].get("Finalizing") != 1: failures.append("status_counts_changed not emitted for Finalizing")
+
+    # Seperti on_finalize_finished: finalize_progress dikosongkan lalu status FINISHED
+    items[1].finalize_progress = None
+    items[1].status = m.DownloadStatus.FINISHED
+    source.refresh_item(items[1])
+    check("finished", {"Downloading": ["a.bin"], "Finalizing": [], "Paused": ["c.bin"],
+                       "Finished": ["b.bin", "d.bin", "e.bin"]})
+
+    source.shutdown()
+    print("filter proxy:", "ok" if not failures else f"{len(failures)} failures")
+    for failure in failures: print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Server HTTP lokal untuk script di folder ini (Range, HEAD, dan endpoint yang sengaja macet).
+
+    /small     64 KiB, mendukung Range
+    /slow      1 MiB dengan laju ~1.5 MB/s, mendukung Range
+    /stall     kirim header + 1000 byte lalu diam sampai server dimatikan
+    /bulk      64 MiB secepat mungkin, mendukung Range
+
+`python local_server.py` menjalankan server di proses sendiri (mencetak base URL, berhenti
+saat stdin ditutup), agar CPU server tidak ikut terukur di proses benchmark.
+"""
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SMALL_PAYLOAD = bytes(range(256)) * 256 # 64 KiB
+STALL_SIZE = 100 * 1024 * 1024
+SLOW_PAYLOAD = bytes(range(256)) * 4096 # 1 MiB
+SLOW_CHUNK = 16 * 1024
+BULK_PAYLOAD = bytes(range(256)) * (256 * 1024) # 64 MiB
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args): pass
+
+    def _send(self, head):
+        path = self.path.split('?')[0]
+        if path.startswith('/stall'): size = STALL_SIZE
+        elif path.startswith('/small'): size = len(SMALL_PAYLOAD)
+        elif path.startswith('/slow'): size = len(SLOW_PAYLOAD)
+        elif path.startswith('/bulk'): size = len(BULK_PAYLOAD)
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if match.group(2): end = min(int(match.group(2)), size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head: return
+        if path.startswith('/stall'):
+            self.wfile.write(b'\0' * 1000)
+            self.wfile.flush()
+            self.server.stop_event.wait() # Server macet: tidak ada byte lagi, koneksi tetap terbuka
+            return
+        if path.startswith('/slow'):
+            for offset in range(start, end + 1, SLOW_CHUNK):
+                self.wfile.write(SLOW_PAYLOAD[offset:min(offset + SLOW_CHUNK, end + 1)])
+                time.sleep(0.01)
+            return
+        if path.startswith('/bulk'):
+            self.wfile.write(memoryview(BULK_PAYLOAD)[start:end + 1])
+            return
+        self.wfile.write(SMALL_PAYLOAD[start:end + 1])
+
+    def do_GET(self):
+        try: self._send(False)
+        except (BrokenPipeError, ConnectionResetError): pass
+
+    def do_HEAD(self): self._send(True)
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128 # Default 5: puluhan koneksi serentak (resume massal) kena retry SYN ~1 s
+    daemon_threads = True
+
+class LocalServer:
+    """`with LocalServer() as base_url:` -> server di port acak, dimatikan saat keluar."""
+    def __enter__(self):
+        self.httpd = _Server(('127.0.0.1', 0), _Handler)
+        self.httpd.stop_event = threading.Event()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __exit__(self, *exc):
+        self.httpd.stop_event.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == '__main__':
+    with LocalServer() as base_url:
+        print(base_url, flush=True)
+        sys.stdin.read()
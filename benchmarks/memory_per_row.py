@@ -0,0 +1,78 @@
+"""Memori per baris riwayat FINISHED: item __dict__ lama vs DownloadItem __slots__ vs DownloadArchive.
+
+    python benchmarks/memory_per_row.py [jumlah_baris]
+
+Diukur dengan tracemalloc; string yang sudah ada di record sumber (uid, url, path)
+tidak dihitung karena dibagi dengan record tersebut.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import macan_download14 as m
+
+class LegacyDownloadItem:
+    """Tata letak sebelum __slots__: __dict__ per item, tanggal & teks speed/ETA sebagai string."""
+    def __init__(self, data):
+        self.uid = data['uid']
+        self.url = data['url']
+        self.filepath = data['filepath']
+        self.filename = os.path.basename(data['filepath'])
+        self.status = m.DownloadStatus.FINISHED
+        self.category = data['category']
+        self.total_size = data['total_size']
+        self.downloaded_size = data['downloaded_size']
+        self.progress = 100
+        self.speed = "N/A"
+        self.time_left = "N/A"
+        self.date_added = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(m.parse_date_added(data['date_added'])))
+        self.retries = 0
+        self.worker = None
+        self.thread = None
+        self.splits = data['splits']
+        self.checksum_algo = data['checksum_algo'] or None
+        self.expected_checksum = data['expected_checksum']
+        self.checksum = data['checksum']
+        self.error_message = ""
+        self.verify_progress = None
+        self.finalize_progress = None
+
+def make_records(count):
+    categories = ["General", "Video", "Music", "Documents", "Programs"]
+    return [{'uid': str(uuid.uuid4()), 'url': f"https://example.com/files/{i}/file_{i}.bin",
+             'filepath': f"/home/user/Downloads/file_{i}.bin", 'status': m.DownloadStatus.FINISHED.value,
+             'category': categories[i % len(categories)], 'total_size': 1000000 + i, 'downloaded_size': 1000000 + i,
+             'date_added': "2025-01-02 03:04:05", 'splits': 1 + i % 8, 'checksum_algo': "",
+             'expected_checksum': "", 'checksum': ""} for i in range(count)]
+
+def measure(build, records):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = build(records)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rows
+    return (after - before) / len(records)
+
+def build_archive(records):
+    archive = m.DownloadArchive()
+    for data in records: archive.append_record(data)
+    return archive
+
+def main(count):
+    records = make_records(count)
+    results = [("dict item (before)", measure(lambda rs: [LegacyDownloadItem(d) for d in rs], records)),
+               ("__slots__ DownloadItem", measure(lambda rs: [m.DownloadItem.from_dict(d) for d in rs], records)),
+               ("DownloadArchive", measure(build_archive, records))]
+    print(f"{count} finished rows")
+    for label, per_row in results:
+        print(f"  {label:<24} {per_row:7.0f} B/row")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,56 @@
+"""Biaya paint per sel progress: QStyleOptionProgressBar + drawControl lama vs ProgressBarDelegate.
+
+    python benchmarks/paint_progress.py [jumlah_paint]
+
+Sel 200x30 digambar ke QImage offscreen; 100 baris dengan progress 0..99, baris ganjil
+punya 4 segmen (dipakai hanya oleh mode per-segmen).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QImage, QPainter, QStandardItem, QStandardItemModel
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionProgressBar, QStyleOptionViewItem
+
+import macan_download14 as m
+
+class DrawControlDelegate(QStyledItemDelegate):
+    """Delegate sebelum perubahan: satu QStyleOptionProgressBar + drawControl per sel."""
+    def paint(self, painter, option, index):
+        progress = index.data()
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect
+        bar.minimum, bar.maximum, bar.progress = 0, 100, progress
+        bar.text, bar.textVisible, bar.textAlignment = f"{progress}%", True, Qt.AlignCenter
+        QApplication.style().drawControl(QStyle.CE_ProgressBar, bar, painter)
+
+def main(count):
+    app = QApplication(sys.argv)
+    model = QStandardItemModel(100, 3)
+    for row in range(100):
+        cell = QStandardItem()
+        cell.setData(row, Qt.DisplayRole)
+        if row % 2: cell.setData((0.2, 0.9, 0.5, 1.0), m.SEGMENTS_ROLE)
+        model.setItem(row, 2, cell)
+    indexes = [model.index(row, 2) for row in range(100)]
+    image = QImage(200, 30, QImage.Format_ARGB32_Premultiplied)
+    print(f"{count} paints, 200x30 cell, style {app.style().name()}")
+    for label, delegate in [("drawControl (before)", DrawControlDelegate()),
+                            ("delegate, cached bars", m.ProgressBarDelegate(show_segments=False)),
+                            ("delegate, segments", m.ProgressBarDelegate(show_segments=True))]:
+        painter = QPainter(image)
+        option = QStyleOptionViewItem()
+        option.rect, option.font = QRect(0, 0, 200, 30), app.font()
+        for index in indexes: delegate.paint(painter, option, index) # Isi cache dulu, seperti tabel yang sudah tampil
+        started = time.perf_counter()
+        for k in range(count): delegate.paint(painter, option, indexes[k % 100])
+        elapsed = time.perf_counter() - started
+        painter.end()
+        print(f"  {label:<22} {elapsed / count * 1e6:6.1f} us/cell")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,74 @@
+"""Cek: state laju per item (DownloadManager.rate_estimators) dilepas saat transfer berakhir.
+
+    python benchmarks/rate_state.py
+
+Download ke server lokal yang lambat (agar estimator sempat dibuat) lalu diakhiri dengan
+selesai (split 1/1/2), error (404, checksum salah), pause, dan stop. Gagal (exit 1) jika rate_estimators
+masih berisi uid sesudahnya.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QSettings
+from PySide6.QtWidgets import QApplication
+
+import macan_download14 as m
+from local_server import LocalServer
+from cancel_latency import wait_until
+
+TIMEOUT_SECONDS = 20
+
+def main():
+    app = QApplication(sys.argv)
+    workdir = tempfile.mkdtemp(prefix="macan-rate-")
+    settings = QSettings(os.path.join(workdir, "settings.ini"), QSettings.IniFormat)
+    settings.setValue("max_concurrent_downloads", 4)
+    manager = m.DownloadManager(settings)
+    failures = []
+
+    def check(label, items, done, action=None):
+        peak = [len(manager.rate_estimators)]
+        if action is not None: action()
+        def settled():
+            peak[0] = max(peak[0], len(manager.rate_estimators))
+            return done() and not manager.finalizing
+        if wait_until(app, settled, TIMEOUT_SECONDS) is None:
+            failures.append(f"{label}: did not settle within {TIMEOUT_SECONDS} s ({[item.status.value for item in items]})")
+            return
+        wait_until(app, lambda: False, 0.3) # Beberapa tick sample_progress sesudahnya
+        left = len(manager.rate_estimators)
+        print(f"  {label:<8} peak estimators {peak[0]}, left {left}")
+        if left: failures.append(f"{label}: {left} rate estimators left")
+
+    def transferring(items): # Semua item sudah punya estimator
+        return wait_until(app, lambda: all(item.uid in manager.rate_estimators for item in items), TIMEOUT_SECONDS) is not None
+
+    with LocalServer() as base_url:
+        finished = [manager.add_download(f"{base_url}/slow", os.path.join(workdir, f"f{n}.bin"), "General", splits)
+                    for n, splits in enumerate((1, 1, 2))]
+        check("finish", finished, lambda: all(item.status == m.DownloadStatus.FINISHED for item in finished))
+
+        failed = [manager.add_download(f"{base_url}/missing", os.path.join(workdir, "e0.bin"), "General", 1),
+                  manager.add_download(f"{base_url}/slow", os.path.join(workdir, "e1.bin"), "General", 1, "sha256", "0" * 64),
+                  manager.add_download(f"{base_url}/slow", os.path.join(workdir, "e2.bin"), "General", 2, "sha256", "0" * 64)]
+        check("error", failed, lambda: all(item.status == m.DownloadStatus.ERROR for item in failed))
+
+        for action, status in (('pause', m.DownloadStatus.PAUSED), ('stop', m.DownloadStatus.STOPPED)):
+            items = [manager.add_download(f"{base_url}/slow", os.path.join(workdir, f"{action}{n}.bin"), "General", splits)
+                     for n, splits in enumerate((1, 2))]
+            if not transferring(items): failures.append(f"{action}: transfers did not start")
+            check(action, items, lambda: all(item.status == status for item in items),
+                  lambda: [manager.control_download(item.uid, action) for item in items])
+            if action == 'pause':
+                for item in items: manager.control_download(item.uid, 'stop')
+    manager.close_store()
+    for failure in failures: print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Stress test scheduler: ribuan download kecil dimulai sementara 8 thread mengirim stop/retry/pause/resume acak.
+
+    python benchmarks/stress_start_stop.py [jumlah_item]
+
+Gagal (exit 1) jika ada item yang tertinggal tanpa worker, slot bocor, file FINISHED
+tidak lengkap, atau thread worker tidak berakhir.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QSettings, QTimer
+from PySide6.QtWidgets import QApplication
+
+import macan_download14 as m
+from local_server import LocalServer, SMALL_PAYLOAD
+
+TIMEOUT_SECONDS = 180
+MAX_CONCURRENT = 32
+
+def main(count):
+    app = QApplication(sys.argv)
+    workdir = tempfile.mkdtemp(prefix="macan-stress-")
+    settings = QSettings(os.path.join(workdir, "settings.ini"), QSettings.IniFormat)
+    settings.setValue("max_concurrent_downloads", 0) # Antrian diisi dulu, baru dibuka
+    manager = m.DownloadManager(settings)
+    with LocalServer() as base_url:
+        rng = random.Random(42)
+        added = []
+        manager.downloads_added.connect(added.append)
+        manager.add_downloads([{'url': f"{base_url}/small", 'splits': rng.choice([1, 2, 4])} for _ in range(count)],
+                              directory=os.path.join(workdir, "files"))
+        while not added:
+            app.processEvents()
+            time.sleep(0.001)
+        uids = [item.uid for item in manager.downloads]
+        peak = [0]
+
+        def churn(seed):
+            r = random.Random(seed)
+            for _ in range(count // 4):
+                manager.commands.post(manager.control_download, r.choice(uids), r.choice(['stop', 'stop', 'retry', 'pause', 'resume']))
+                time.sleep(r.random() * 0.002)
+
+        settings.setValue("max_concurrent_downloads", MAX_CONCURRENT)
+        started = time.time()
+        manager.apply_settings()
+        churners = [threading.Thread(target=churn, args=(seed,)) for seed in range(8)]
+        for thread in churners: thread.start()
+        terminal = (m.DownloadStatus.FINISHED, m.DownloadStatus.ERROR, m.DownloadStatus.STOPPED)
+        result = {}
+
+        def check():
+            peak[0] = max(peak[0], len(manager.active_downloads))
+            if any(thread.is_alive() for thread in churners): return
+            for item in manager.downloads: # Item yang terakhir di-pause dilanjutkan agar run selesai
+                if item.status == m.DownloadStatus.PAUSED and item.uid in manager.active_downloads:
+                    manager.control_download(item.uid, 'resume')
+            settled = (all(item.status in terminal for item in manager.downloads) and not manager.active_downloads
+                       and not manager.download_queue and not manager.finalizing)
+            if settled or time.time() - started > TIMEOUT_SECONDS:
+                result['settled'] = settled
+                result['elapsed'] = time.time() - started
+                app.quit()
+
+        timer = QTimer()
+        timer.timeout.connect(check)
+        timer.start(20)
+        app.exec()
+        deadline = time.time() + 10 # Thread worker yang di-stop keluar sendiri
+        while manager.worker_threads and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    statuses = Counter(item.status.value for item in manager.downloads)
+    incomplete = [item for item in manager.downloads
+                  if item.status == m.DownloadStatus.FINISHED and os.path.getsize(item.filepath) != len(SMALL_PAYLOAD)]
+    print(f"{count} items in {result['elapsed']:.1f} s: {dict(statuses)}; peak active {peak[0]}")
+    failures = []
+    if not result['settled']: failures.append(f"not settled after {TIMEOUT_SECONDS} s (active {len(manager.active_downloads)}, "
+                                              f"queue {len(manager.download_queue)})")
+    if peak[0] > MAX_CONCURRENT: failures.append(f"peak active {peak[0]} > {MAX_CONCURRENT}")
+    if incomplete: failures.append(f"{len(incomplete)} FINISHED files with wrong size")
+    if manager.worker_threads: failures.append(f"{len(manager.worker_threads)} worker threads still running")
+    manager.close_store()
+    for failure in failures: print("FAIL:", failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,78 @@
+"""Throughput per core loop transfer worker, di build GIL maupun free-threaded (3.13t).
+
+    python benchmarks/threads_per_core.py [MiB_per_run]
+
+Tidak mengimpor macan_download14 (PySide6 belum punya wheel 3.13t); hanya stdlib +
+requests. Tiap thread menjalankan loop yang sama dengan DownloadWorker._run_once untuk
+split download dengan checksum: iter_content -> write -> flush -> sha256.update ->
+counter per slot. Server berjalan di proses terpisah, jadi CPU yang diukur
+(time.process_time) hanya milik worker.
+
+    MB/s wall   throughput total
+    MB/s/core   byte per detik CPU proses: tetap pada build GIL (thread saling menunggu),
+                naik bersama wall di build free-threaded sampai core habis
+"""
+import hashlib
+import os
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+
+import requests
+
+THREAD_COUNTS = (1, 2, 4, 8)
+CHUNK_SIZES = (8 * 1024, 64 * 1024) # DOWNLOAD_CHUNK_SIZE lama dan sekarang
+BULK_SIZE = 64 * 1024 * 1024
+
+def transfer(url, byte_range, path, chunk_size, counters, slot):
+    hasher = hashlib.sha256()
+    headers = {'Range': f'bytes={byte_range[0]}-{byte_range[1]}'}
+    with requests.get(url, stream=True, timeout=30, headers=headers) as r, open(path, 'wb') as f:
+        r.raise_for_status()
+        downloaded = 0
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            f.write(chunk)
+            f.flush()
+            hasher.update(chunk)
+            downloaded += len(chunk)
+            counters[slot] = downloaded
+    return hasher.hexdigest()
+
+def run(url, threads, chunk_size, total, workdir):
+    part = total // threads
+    counters = [0] * threads
+    workers = [threading.Thread(target=transfer, args=(url, (i * part, (i + 1) * part - 1), os.path.join(workdir, f"{i}.part"),
+                                                       chunk_size, counters, i)) for i in range(threads)]
+    wall, cpu = time.perf_counter(), time.process_time()
+    for worker in workers: worker.start()
+    for worker in workers: worker.join()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    assert sum(counters) == part * threads, "short transfer"
+    return sum(counters) / 1e6 / wall, sum(counters) / 1e6 / cpu
+
+def main(mib):
+    total = min(mib * 1024 * 1024, BULK_SIZE)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    build = "free-threaded" if sysconfig.get_config_var("Py_GIL_DISABLED") else "standard"
+    print(f"Python {sys.version.split()[0]} ({build}, GIL {'enabled' if gil else 'disabled'}), "
+          f"{os.cpu_count()} CPUs, {total // (1024 * 1024)} MiB per run")
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_server.py")],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        url = server.stdout.readline().strip() + "/bulk"
+        with tempfile.TemporaryDirectory(prefix="macan-threads-") as workdir:
+            run(url, 1, CHUNK_SIZES[-1], total, workdir) # Pemanasan (page cache, koneksi pertama)
+            print(f"  {'chunk':>6} {'threads':>7} {'MB/s wall':>10} {'MB/s/core':>10}")
+            for chunk_size in CHUNK_SIZES:
+                for threads in THREAD_COUNTS:
+                    wall, per_core = run(url, threads, chunk_size, total, workdir)
+                    print(f"  {chunk_size // 1024:>4} K {threads:>7} {wall:>10.0f} {per_core:>10.0f}")
+    finally:
+        server.stdin.close()
+        server.wait()
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
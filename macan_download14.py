@@ -1,28 +1,47 @@
 import sys
 import os
 import time
+import math
 import json
+import sqlite3
+import re
+import queue
+import socket
 import uuid
+import hashlib
+import base64
+import binascii
+import zlib
+import mmap
+import multiprocessing
 import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from functools import partial
 from enum import Enum
 from urllib.parse import urlparse
 if sys.platform == "win32":
     import winreg
 import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QToolBar, QLabel, QTableView, QHeaderView, QAbstractItemView,
     QProgressBar, QDialog, QLineEdit, QPushButton, QFileDialog,
-    QMessageBox, QListWidget, QSplitter, QMenu, QSystemTrayIcon,
-    QStyledItemDelegate, QStyle, QStyleOptionProgressBar, QSpinBox,
-    QComboBox, QFormLayout, QCheckBox, QSizePolicy, QFileIconProvider
+    QMessageBox, QListWidget, QListWidgetItem, QSplitter, QMenu, QSystemTrayIcon,
+    QStyledItemDelegate, QStyle, QSpinBox,
+    QComboBox, QFormLayout, QCheckBox, QSizePolicy, QFileIconProvider, QPlainTextEdit,
+    QInputDialog
+)
+from PySide6.QtGui import (
+    QIcon, QAction, QKeySequence, QPixmap, QStandardItemModel, QStandardItem, QPainter, QColor, QPen, QBrush,
+    QLinearGradient, QGradient, QFontMetricsF, QPolygonF
 )
-from PySide6.QtGui import QIcon, QAction, QPixmap, QStandardItemModel, QStandardItem, QPainter
 from PySide6.QtCore import (
     Qt, QSize, QThread, QObject, Signal, Slot, QAbstractTableModel,
-    QModelIndex, QSettings, QSortFilterProxyModel, QFileInfo
+    QModelIndex, QSettings, QAbstractProxyModel, QFileInfo, QTimer, QRectF, QPointF, QDeadlineTimer
 )
 from PySide6.QtSvg import QSvgRenderer
 # Pastikan macan_dialog.py berada di direktori yang sama
@@ -37,6 +56,9 @@ SVG_SETTINGS = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24"
 SVG_STOP_ALL = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><rect x="3" y="3" width="18" height="18" rx="2" ry="2"></rect><line x1="9" y1="9" x2="15" y2="15"></line><line x1="15" y1="9" x2="9" y2="15"></line></svg>"""
 SVG_SEARCH = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="11" cy="11" r="8"></circle><line x1="21" y1="21" x2="16.65" y2="16.65"></line></svg>"""
 SVG_ABOUT = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="10"></circle><line x1="12" y1="16" x2="12" y2="12"></line><line x1="12" y1="8" x2="12.01" y2="8"></line></svg>"""
+SVG_VERIFY = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M12 22s8-4 8-10V5l-8-3-8 3v7c0 6 8 10 8 10z"></path><polyline points="9 12 11 14 15 10"></polyline></svg>"""
+SVG_IMPORT_LIST = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="8" y1="6" x2="21" y2="6"></line><line x1="8" y1="12" x2="21" y2="12"></line><line x1="8" y1="18" x2="21" y2="18"></line><line x1="3" y1="6" x2="3.01" y2="6"></line><line x1="3" y1="12" x2="3.01" y2="12"></line><line x1="3" y1="18" x2="3.01" y2="18"></line></svg>"""
+SVG_REMOVE = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="10"></circle><line x1="8" y1="12" x2="16" y2="12"></line></svg>"""
 SVG_CLEAR_ALL = """<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polyline points="3 6 5 6 21 6"></polyline><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path><line x1="10" y1="11" x2="10" y2="17"></line><line x1="14" y1="11" x2="14" y2="17"></line></svg>"""
 
 # --- Helper Functions ---
@@ -59,6 +81,319 @@ def format_size(size_bytes):
     size = round(size_bytes / power, 2)
     return f"{size} {size_name[i]}"
 
+def format_speed(speed_bps): return f"{format_size(speed_bps)}/s" if speed_bps > 0 else "N/A"
+
+def format_eta(seconds):
+    if seconds is None: return "N/A"
+    seconds = int(seconds)
+    if seconds < 60: return f"{seconds}s"
+    mins, secs = divmod(seconds, 60)
+    if mins < 60: return f"{mins}m {secs}s"
+    hours, mins = divmod(mins, 60)
+    if hours < 24: return f"{hours}h {mins}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+# --- Estimasi kecepatan & ETA ---
+DEFAULT_SPEED_WINDOW_SECONDS = 5
+MIN_RATE_SAMPLE_SECONDS = 0.25 # Sampel lebih rapat dari ini digabung ke sampel berikutnya
+
+class TransferRateEstimator:
+    """Kecepatan rata-rata bergerak eksponensial (EWMA) per item.
+
+    Bobot sampel bergantung pada jarak waktunya (alpha = 1 - e^(-dt/window)), jadi hasilnya
+    tidak bergantung pada seberapa sering worker melapor. State hanya angka; formatting
+    dilakukan oleh DownloadItem saat ditampilkan.
+    """
+    __slots__ = ('window', 'speed_bps', 'last_time', 'last_bytes')
+
+    def __init__(self, window=DEFAULT_SPEED_WINDOW_SECONDS):
+        self.set_window(window)
+        self.speed_bps = None
+        self.last_time = None
+        self.last_bytes = 0
+
+    def update(self, now, downloaded_bytes):
+        """Returns True jika speed_bps diperbarui."""
+        if self.last_time is None: # Sampel pertama hanya jadi titik acuan (resume tidak dihitung sebagai kecepatan)
+            self.last_time, self.last_bytes = now, downloaded_bytes
+            return False
+        elapsed = now - self.last_time
+        if elapsed < MIN_RATE_SAMPLE_SECONDS: return False
+        rate = max(downloaded_bytes - self.last_bytes, 0) / elapsed
+        if self.speed_bps is None: self.speed_bps = rate
+        else: self.speed_bps += (1 - math.exp(-elapsed / self.window)) * (rate - self.speed_bps)
+        self.last_time, self.last_bytes = now, downloaded_bytes
+        return True
+
+    def set_window(self, window): self.window = max(float(window), MIN_RATE_SAMPLE_SECONDS)
+
+    def eta(self, remaining_bytes):
+        if not self.speed_bps or remaining_bytes <= 0: return None
+        return remaining_bytes / self.speed_bps
+
+THROUGHPUT_SAMPLE_MS = 1000
+PROGRESS_SAMPLE_MS = 250 # Laju baca counter byte worker (lihat DownloadManager.sample_progress)
+THROUGHPUT_SAMPLES = 120 # 2 menit riwayat per item
+
+class ThroughputHistory:
+    """Ring buffer throughput (byte/s) berukuran tetap di atas array('f').
+
+    push() O(1) dan memori konstan berapa lama pun download berjalan; values()
+    mengembalikan sampel urut dari yang terlama.
+    """
+    __slots__ = ('samples', 'head', 'count', 'last_bytes')
+
+    def __init__(self, size=THROUGHPUT_SAMPLES):
+        self.samples = array('f', bytes(4 * size))
+        self.head = 0 # Posisi tulis berikutnya
+        self.count = 0
+        self.last_bytes = None # Untuk menghitung delta antar sampel
+
+    def push(self, value):
+        self.samples[self.head] = value
+        self.head = (self.head + 1) % len(self.samples)
+        if self.count < len(self.samples): self.count += 1
+
+    def sample_bytes(self, downloaded_bytes, interval):
+        """Catat throughput dari total byte; returns delta byte sejak sampel sebelumnya."""
+        delta = 0 if self.last_bytes is None else max(downloaded_bytes - self.last_bytes, 0)
+        self.last_bytes = downloaded_bytes
+        self.push(delta / interval)
+        return delta
+
+    def values(self):
+        size = len(self.samples)
+        if self.count < size: return self.samples[:self.count].tolist()
+        return (self.samples[self.head:] + self.samples[:self.head]).tolist()
+
+    def latest(self): return self.samples[self.head - 1] if self.count else 0.0
+
+# --- Mode free-threaded (Python 3.13t) ---
+# Tanpa GIL, hashing di thread sudah paralel; process pool (spawn + IPC) tidak diperlukan
+FREE_THREADED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+# --- Checksum / Integrity ---
+# Label di UI -> nama algoritma hashlib
+CHECKSUM_ALGORITHMS = {"SHA-256": "sha256", "SHA-1": "sha1", "MD5": "md5", "BLAKE2b": "blake2b"}
+HASH_READ_CHUNK = 1024 * 1024
+
+class Crc32Hasher:
+    """CRC32 dengan antarmuka mirip hashlib (untuk x-amz-checksum-crc32)."""
+    def __init__(self): self.value = 0
+    def update(self, data): self.value = zlib.crc32(data, self.value)
+    def hexdigest(self): return f"{self.value & 0xFFFFFFFF:08x}"
+
+def new_hasher(algo):
+    if algo == "crc32": return Crc32Hasher()
+    return hashlib.new(algo or "sha256")
+
+class MultiHasher:
+    """Satu kali baca, beberapa algoritma sekaligus."""
+    def __init__(self, algos):
+        self.primary = algos[0] if algos else None
+        self.hashers = {algo: new_hasher(algo) for algo in algos}
+    def update(self, data):
+        for hasher in self.hashers.values(): hasher.update(data)
+    def hexdigest(self, algo=None): return self.hashers[algo or self.primary].hexdigest()
+    def __bool__(self): return bool(self.hashers)
+
+def hash_file_into(hasher, path, length=None, offset=0):
+    """Feeds `length` bytes of `path` starting at `offset` (or everything after it) into `hasher`."""
+    remaining = length
+    with open(path, 'rb') as f:
+        if offset: f.seek(offset)
+        while remaining is None or remaining > 0:
+            to_read = HASH_READ_CHUNK if remaining is None else min(HASH_READ_CHUNK, remaining)
+            data = f.read(to_read)
+            if not data: break
+            hasher.update(data)
+            if remaining is not None: remaining -= len(data)
+
+class SegmentHashChain:
+    """Menghitung hash file split sesuai urutan stream, selama byte datang.
+
+    Setiap worker part memanggil `feed(index, chunk)` setelah menulis chunk ke
+    disk. Chunk milik part terdepan yang belum selesai di-hash (`next_index`)
+    langsung masuk hasher tanpa dibaca ulang; part di belakangnya hanya ditulis.
+    Begitu part terdepan selesai (`part_done`), byte part berikutnya yang sudah
+    ada di disk dikejar sekali (dibaca dari page cache) lalu sisanya kembali
+    di-hash langsung dari stream. Saat part terakhir selesai digest sudah siap.
+
+    Lock hanya menjaga penanda; hashing dilakukan di luar lock oleh satu
+    thread "pemilik" (`hashing`). Worker lain tidak pernah menunggu hashing
+    part orang lain: chunk-nya tetap di disk dan dikejar oleh pemilik.
+    """
+    def __init__(self, algos, part_paths):
+        self.hasher = MultiHasher(algos)
+        self.part_paths = part_paths
+        self.done = [False] * len(part_paths)
+        self.written = [0] * len(part_paths) # Byte part di disk (dilaporkan worker-nya)
+        self.hashed = [0] * len(part_paths) # Byte part yang sudah masuk hasher
+        self.next_index = 0
+        self.hashing = False # True selama ada thread yang sedang hash (di luar lock)
+        self.broken = False # Byte yang sudah di-hash dibuang (range di-fetch ulang) -> finalizer hash ulang
+        self.lock = threading.Lock()
+
+    def sync_part(self, index, size):
+        """Worker mulai (atau lanjut) dari `size` byte di disk; dipanggil sebelum chunk pertama."""
+        with self.lock:
+            if self.hashed[index] > size: self.broken = True
+            self.written[index] = size
+
+    def feed(self, index, chunk):
+        with self.lock:
+            self.written[index] += len(chunk)
+            if self.broken or self.hashing or index != self.next_index: return
+            self.hashing = True
+            live = self.hashed[index] + len(chunk) == self.written[index]
+        if live:
+            self.hasher.update(chunk)
+            with self.lock: self.hashed[index] += len(chunk)
+        self._drain()
+
+    def part_done(self, index):
+        with self.lock:
+            self.done[index] = True
+            if self.broken or self.hashing: return # Pemilik yang sedang jalan akan mengambil part ini
+            self.hashing = True
+        self._drain()
+
+    def _drain(self):
+        """Dijalankan pemilik (`hashing` True): kejar byte di disk yang belum di-hash, maju ke part berikutnya."""
+        while True:
+            with self.lock:
+                index = self.next_index
+                if self.broken or index >= len(self.part_paths):
+                    self.hashing = False
+                    return
+                start, end = self.hashed[index], self.written[index]
+                if start == end:
+                    if not self.done[index]:
+                        self.hashing = False # Sisa part ini di-hash langsung oleh feed() worker-nya
+                        return
+                    self.next_index += 1
+                    continue
+                path = self.part_paths[index]
+            hash_file_into(self.hasher, path, end - start, start)
+            with self.lock: self.hashed[index] = end
+
+    def is_complete(self):
+        with self.lock: return not self.broken and self.next_index == len(self.part_paths)
+    def hexdigest(self, algo=None): return self.hasher.hexdigest(algo)
+
+def checksum_mismatch_message(algo, expected, actual):
+    return f"Checksum mismatch ({algo}): expected {expected}, got {actual}"
+
+# --- Digest dari server (Repr-Digest, Content-Digest, Digest, Content-MD5, x-amz-checksum-*) ---
+SERVER_DIGEST_ALGORITHMS = {
+    "sha-256": "sha256", "sha256": "sha256", "sha-512": "sha512", "sha512": "sha512",
+    "sha": "sha1", "sha-1": "sha1", "sha1": "sha1", "md5": "md5", "crc32": "crc32",
+}
+AMZ_CHECKSUM_PREFIX = "x-amz-checksum-"
+
+def _b64_to_hex(value):
+    try: return base64.b64decode(value.strip().strip(':'), validate=True).hex()
+    except (binascii.Error, ValueError): return None
+
+def _parse_digest_field(value, target):
+    """`sha-256=:b64:, md5=:b64:` (RFC 9530) atau `SHA-256=b64` (RFC 3230)."""
+    for member in value.split(','):
+        name, sep, encoded = member.strip().partition('=')
+        algo = SERVER_DIGEST_ALGORITHMS.get(name.strip().lower())
+        if not sep or not algo: continue
+        digest = _b64_to_hex(encoded)
+        if digest: target.setdefault(algo, digest)
+
+def parse_server_digests(headers):
+    """Returns (representation, content): dua dict {algo: hexdigest}.
+
+    `representation` berlaku untuk seluruh file (Repr-Digest, Digest,
+    x-amz-checksum-*), `content` hanya untuk body respons ini (Content-Digest,
+    Content-MD5) - pada respons 206 berarti digest range tersebut.
+    """
+    representation, content = {}, {}
+    encoding = headers.get('Content-Encoding', 'identity').lower()
+    if encoding not in ('', 'identity'):
+        return representation, content # Body sudah di-decode oleh requests, digest tidak cocok lagi
+    if headers.get('Repr-Digest'): _parse_digest_field(headers['Repr-Digest'], representation)
+    if headers.get('Digest'): _parse_digest_field(headers['Digest'], representation)
+    if headers.get('Content-Digest'): _parse_digest_field(headers['Content-Digest'], content)
+    if headers.get('Content-MD5'):
+        digest = _b64_to_hex(headers['Content-MD5'])
+        if digest: content.setdefault('md5', digest)
+    for name, value in headers.items():
+        name = name.lower()
+        if name.startswith(AMZ_CHECKSUM_PREFIX) and '-' not in value: # "-N" = checksum multipart komposit
+            algo = SERVER_DIGEST_ALGORITHMS.get(name[len(AMZ_CHECKSUM_PREFIX):])
+            digest = _b64_to_hex(value) if algo else None
+            if digest: representation.setdefault(algo, digest)
+    return representation, content
+
+def find_digest_mismatch(hasher, expected_digests, source):
+    """Returns pesan error untuk digest pertama yang tidak cocok, atau None."""
+    for algo, expected in expected_digests.items():
+        actual = hasher.hexdigest(algo)
+        if actual != expected:
+            return f"{source} digest mismatch ({algo}): expected {expected}, got {actual}"
+    return None
+
+# Panjang hex digest -> algoritma, dipakai jika nama manifest tidak memberi petunjuk
+DIGEST_LENGTH_ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+MANIFEST_NAME_ALGORITHMS = {"SHA256": "sha256", "SHA1": "sha1", "MD5": "md5", "SHA512": "sha512", "B2": "blake2b"}
+BSD_MANIFEST_LINE = re.compile(r"^(\w+) \((.+)\) = ([0-9a-fA-F]+)$")
+
+def parse_checksum_manifest(path):
+    """Membaca SHA256SUMS/MD5SUMS/... (format GNU maupun BSD).
+
+    Returns a list of (filename, algo, hexdigest); filename relatif terhadap folder manifest.
+    """
+    name_hint = None
+    upper_name = os.path.basename(path).upper()
+    for prefix, algo in MANIFEST_NAME_ALGORITHMS.items():
+        if upper_name.startswith(prefix): name_hint = algo; break
+
+    entries = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            bsd = BSD_MANIFEST_LINE.match(line)
+            if bsd:
+                algo = MANIFEST_NAME_ALGORITHMS.get(bsd.group(1).upper(), bsd.group(1).lower())
+                entries.append((os.path.normpath(bsd.group(2)), algo, bsd.group(3).lower()))
+                continue
+            parts = line.split(None, 1)
+            if len(parts) != 2: continue
+            digest, filename = parts[0].lower(), parts[1].lstrip('*')
+            algo = name_hint or DIGEST_LENGTH_ALGORITHMS.get(len(digest))
+            if algo: entries.append((os.path.normpath(filename), algo, digest))
+    return entries
+
+_hash_progress_queue = None
+HASH_PROGRESS_STEP = 16 * 1024 * 1024
+
+def _init_hash_process(progress_queue):
+    global _hash_progress_queue
+    _hash_progress_queue = progress_queue
+
+def hash_file_mmap(uid, path, algo):
+    """Dijalankan di pool ManifestVerifier (proses, atau thread jika free-threaded): hash file lewat mmap,
+    lapor progress per 16 MB."""
+    hasher = new_hasher(algo)
+    size = os.path.getsize(path)
+    if size > 0:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, size, HASH_PROGRESS_STEP):
+                    hasher.update(view[offset:offset + HASH_PROGRESS_STEP])
+                    if _hash_progress_queue is not None:
+                        _hash_progress_queue.put((uid, min(offset + HASH_PROGRESS_STEP, size), size))
+            finally:
+                view.release()
+    return uid, hasher.hexdigest()
+
 def set_autostart(enabled=True):
     """
     FIXED: Mengatur aplikasi untuk start otomatis di Windows,
@@ -100,38 +435,101 @@ def set_autostart(enabled=True):
         print(f"Failed to set autostart: {e}")
 
 
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def parse_date_added(value):
+    try: return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError): return time.time()
+
+def format_date_added(timestamp): return time.strftime(DATE_FORMAT, time.localtime(timestamp))
+
 # --- Data Class untuk Model ---
+PRIORITY_WEIGHTS = {"High": 4, "Normal": 2, "Low": 1} # Bobot jatah bandwidth per item (lihat weighted_fair_shares)
+DEFAULT_PRIORITY = PRIORITY_WEIGHTS["Normal"]
+
 class DownloadItem:
-    def __init__(self, url, filepath, category="General", splits=1):
-        self.uid = str(uuid.uuid4())
+    # __slots__: tanpa __dict__ per item, penting untuk riwayat berukuran besar
+    __slots__ = ('uid', 'url', 'filepath', 'filename', 'status', 'category', 'total_size', 'downloaded_size',
+                 'progress', '_speed_text', '_eta_text', 'added_ts', 'retries', 'worker', 'thread', 'splits',
+                 'checksum_algo', 'expected_checksum', 'checksum', 'error_message', 'verify_progress', 'finalize_progress',
+                 'server_digests', 'speed_bps', 'eta_seconds', 'segment_progress', 'throughput', 'off_peak', 'priority', 'deadline')
+
+    def __init__(self, url, filepath, category="General", splits=1, checksum_algo=None, expected_checksum="", uid=None):
+        self.uid = uid or str(uuid.uuid4())
         self.url = url
         self.filepath = filepath
         self.filename = os.path.basename(filepath)
         self.status = DownloadStatus.QUEUED
-        self.category = category
+        self.category = sys.intern(category)
         self.total_size = 0
         self.downloaded_size = 0
         self.progress = 0
-        self.speed = "N/A"
-        self.time_left = "N/A"
-        self.date_added = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.speed_bps = 0.0 # Nilai numerik; teks dibuat di properti speed/time_left saat tampil
+        self.eta_seconds = None
+        self._speed_text = (0.0, "N/A") # (nilai yang diformat, teks)
+        self._eta_text = (None, "N/A")
+        self.segment_progress = None # Tuple fraksi 0..1 per part selama split download (tidak disimpan)
+        self.throughput = None # ThroughputHistory selama item aktif (tidak disimpan)
+        self.added_ts = time.time() # Disimpan sebagai angka, diformat saat dibutuhkan
         self.retries = 0
         self.worker = None # Bisa berupa Worker atau Koordinator
         self.thread = None # Thread utama untuk worker/koordinator
         self.splits = splits # NEW: Jumlah koneksi/split
+        self.checksum_algo = checksum_algo
+        self.expected_checksum = expected_checksum.strip().lower()
+        self.checksum = "" # Hash yang dihitung selama transfer
+        self.error_message = ""
+        self.verify_progress = None # Progress verifikasi manifest (tidak disimpan)
+        self.finalize_progress = None # Progress merge/verifikasi split download; None = tidak sedang finalisasi
+        self.server_digests = None # {algo: hexdigest} dari header probe
+        self.off_peak = False # Hanya dimulai saat profil jadwal bertanda off-peak
+        self.priority = DEFAULT_PRIORITY # Bobot jatah bandwidth (PRIORITY_WEIGHTS)
+        self.deadline = None # Timestamp; dipakai kebijakan antrian Earliest Deadline First
+
+    @property
+    def date_added(self): return format_date_added(self.added_ts)
+
+    @property
+    def display_progress(self):
+        if self.finalize_progress is not None: return self.finalize_progress
+        return self.progress if self.verify_progress is None else self.verify_progress
+
+    @property
+    def display_status(self):
+        # DownloadStatus (macan_dialog) tidak punya anggota Finalizing; tahap ini murni tampilan
+        return "Finalizing" if self.finalize_progress is not None else self.status.value
+
+    @property
+    def speed(self):
+        """Diformat ulang hanya jika speed_bps berubah sejak tampil terakhir."""
+        if self._speed_text[0] != self.speed_bps: self._speed_text = (self.speed_bps, format_speed(self.speed_bps))
+        return self._speed_text[1]
+
+    @property
+    def time_left(self):
+        if self._eta_text[0] != self.eta_seconds: self._eta_text = (self.eta_seconds, format_eta(self.eta_seconds))
+        return self._eta_text[1]
 
     def to_dict(self):
         return {
             'uid': self.uid, 'url': self.url, 'filepath': self.filepath,
             'status': self.status.value, 'category': self.category,
             'total_size': self.total_size, 'downloaded_size': self.downloaded_size,
-            'date_added': self.date_added, 'splits': self.splits
+            'date_added': self.date_added, 'splits': self.splits,
+            'checksum_algo': self.checksum_algo, 'expected_checksum': self.expected_checksum,
+            'checksum': self.checksum, 'error_message': self.error_message, 'off_peak': int(self.off_peak),
+            'priority': self.priority, 'deadline': self.deadline
         }
 
     @staticmethod
     def from_dict(data):
-        item = DownloadItem(data['url'], data['filepath'], data.get('category', 'General'), data.get('splits', 1))
-        item.uid = data['uid']
+        item = DownloadItem(data['url'], data['filepath'], data.get('category', 'General'), data.get('splits', 1),
+                            data.get('checksum_algo') or None, data.get('expected_checksum', ''), data['uid'])
+        item.checksum = data.get('checksum', '')
+        item.error_message = data.get('error_message', '')
+        item.off_peak = bool(data.get('off_peak', 0))
+        item.priority = data.get('priority', DEFAULT_PRIORITY)
+        item.deadline = data.get('deadline')
         status_val = data['status']
         if status_val == DownloadStatus.FINISHED.value:
             item.status = DownloadStatus.FINISHED
@@ -144,30 +542,553 @@ class DownloadItem:
         item.downloaded_size = data['downloaded_size']
         if item.total_size > 0:
             item.progress = int((item.downloaded_size / item.total_size) * 100)
-        item.date_added = data['date_added']
+        item.added_ts = parse_date_added(data['date_added'])
         return item
 
+class DownloadArchive:
+    """Riwayat FINISHED dalam bentuk struct-of-arrays.
+
+    Tidak ada objek per baris: angka disimpan di `array`, string di list
+    (kategori & algoritma di-intern). DownloadTableModel membaca kolom ini
+    langsung; DownloadItem hanya dibuat (`materialize`) saat sebuah baris
+    perlu diubah.
+    """
+    COLUMNS = ('uids', 'urls', 'filepaths', 'filenames', 'categories', 'checksum_algos', 'checksums',
+               'expected_checksums', 'total_sizes', 'added_ts', 'splits')
+
+    def __init__(self):
+        self.uids, self.urls, self.filepaths, self.filenames = [], [], [], []
+        self.categories, self.checksum_algos, self.checksums, self.expected_checksums = [], [], [], []
+        self.total_sizes = array('q')
+        self.added_ts = array('d')
+        self.splits = array('h')
+        self.verify_progress = {} # {uid: percent} selama verifikasi manifest
+        self._index = None # {uid: row}, dibangun saat pertama dibutuhkan
+
+    def __len__(self): return len(self.uids)
+
+    def append_record(self, data):
+        self.uids.append(data['uid'])
+        self.urls.append(data['url'])
+        self.filepaths.append(data['filepath'])
+        self.filenames.append(os.path.basename(data['filepath']))
+        self.categories.append(sys.intern(data.get('category', 'General')))
+        self.checksum_algos.append(sys.intern(data.get('checksum_algo') or ''))
+        self.checksums.append(data.get('checksum', ''))
+        self.expected_checksums.append(data.get('expected_checksum', ''))
+        self.total_sizes.append(data['total_size'])
+        self.added_ts.append(parse_date_added(data['date_added']))
+        self.splits.append(data.get('splits', 1))
+        self._index = None
+
+    def extend(self, other):
+        for name in self.COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+        self._index = None
+
+    def row_of(self, uid):
+        if self._index is None: self._index = {u: i for i, u in enumerate(self.uids)}
+        return self._index.get(uid)
+
+    def to_dict(self, row):
+        size = self.total_sizes[row]
+        return {
+            'uid': self.uids[row], 'url': self.urls[row], 'filepath': self.filepaths[row],
+            'status': DownloadStatus.FINISHED.value, 'category': self.categories[row],
+            'total_size': size, 'downloaded_size': size,
+            'date_added': format_date_added(self.added_ts[row]), 'splits': self.splits[row],
+            'checksum_algo': self.checksum_algos[row], 'expected_checksum': self.expected_checksums[row],
+            'checksum': self.checksums[row], 'error_message': ''
+        }
+
+    def materialize(self, row): return DownloadItem.from_dict(self.to_dict(row))
+
+    def pop(self, row): self.remove_range(row, row)
+
+    def remove_range(self, first, last):
+        for name in self.COLUMNS:
+            del getattr(self, name)[first:last + 1]
+        self._index = None
+
+    def remove_rows(self, rows):
+        """Hapus banyak baris (tidak harus kontigu) dengan satu lintasan per kolom."""
+        drop = set(rows)
+        keep = [i for i in range(len(self.uids)) if i not in drop]
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            kept = [column[i] for i in keep]
+            setattr(self, name, array(column.typecode, kept) if isinstance(column, array) else kept)
+        self._index = None
+
+    def clear(self): self.__init__()
+
+# --- Penyimpanan daftar download (SQLite, WAL) ---
+class DownloadStore:
+    """Menyimpan DownloadItem.to_dict() per baris; hanya item yang berubah yang ditulis."""
+    COLUMNS = ('uid', 'url', 'filepath', 'status', 'category', 'total_size', 'downloaded_size',
+               'date_added', 'splits', 'checksum_algo', 'expected_checksum', 'checksum', 'error_message', 'off_peak', 'priority', 'deadline')
+    ADDED_COLUMNS = (('off_peak', 'INTEGER DEFAULT 0'), ('priority', f'INTEGER DEFAULT {DEFAULT_PRIORITY}'), ('deadline', 'REAL'))
+
+    def __init__(self, path):
+        self.path = path
+        # Setelah startup koneksi hanya dipakai oleh thread DownloadCheckpointer
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                "uid TEXT PRIMARY KEY, url TEXT NOT NULL, filepath TEXT NOT NULL, status TEXT NOT NULL, "
+                "category TEXT, total_size INTEGER DEFAULT 0, downloaded_size INTEGER DEFAULT 0, "
+                "date_added TEXT, splits INTEGER DEFAULT 1, checksum_algo TEXT, expected_checksum TEXT, "
+                "checksum TEXT, error_message TEXT)")
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(downloads)")}
+            for column, declaration in self.ADDED_COLUMNS: # Kolom yang ditambahkan setelah versi awal
+                if column not in existing: self.conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} {declaration}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_downloads_category ON downloads(category)")
+        columns = ", ".join(self.COLUMNS)
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        updates = ", ".join(f"{c}=excluded.{c}" for c in self.COLUMNS if c != 'uid')
+        self._upsert_sql = f"INSERT INTO downloads ({columns}) VALUES ({placeholders}) ON CONFLICT(uid) DO UPDATE SET {updates}"
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM downloads LIMIT 1").fetchone() is None
+
+    def iter_rows(self, finished, batch_size=500):
+        """Streaming baris per status (memakai idx_downloads_status), urut rowid."""
+        # rowid mengikuti urutan insert -> urutan daftar tetap sama seperti saat ditambahkan.
+        # Kolom NULL (baris hasil migrasi JSON lama) dibuang agar default from_dict berlaku.
+        op = "=" if finished else "!="
+        cursor = self.conn.execute(f"SELECT * FROM downloads WHERE status {op} ? ORDER BY rowid",
+                                   (DownloadStatus.FINISHED.value,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows: break
+            for row in rows:
+                yield {k: row[k] for k in row.keys() if row[k] is not None}
+
+    def commit_changes(self, upserts, deleted_uids=()):
+        """Satu transaksi untuk semua perubahan sejak flush terakhir."""
+        with self.conn:
+            if upserts:
+                self.conn.executemany(self._upsert_sql, [tuple(d.get(c) for c in self.COLUMNS) for d in upserts])
+            if deleted_uids:
+                self.conn.executemany("DELETE FROM downloads WHERE uid = ?", [(uid,) for uid in deleted_uids])
+
+    def close(self): self.conn.close()
+
+# --- Checkpoint crash-safe: journal append-only + kompaksi ke SQLite ---
+class DownloadCheckpointer:
+    """Thread latar yang menulis perubahan ke journal lalu memadatkannya ke DownloadStore.
+
+    GUI thread hanya memanggil `submit()` (non-blocking). Setiap batch langsung
+    di-append ke journal dan di-fsync; secara berkala isi journal diterapkan ke
+    SQLite dalam satu transaksi lalu journal diganti file kosong secara atomik
+    (tulis file temp + os.replace).
+    """
+    def __init__(self, store, journal_path, compact_interval=30.0, max_journal_bytes=4 * 1024 * 1024):
+        self.store = store
+        self.journal_path = journal_path
+        self.compact_interval = compact_interval
+        self.max_journal_bytes = max_journal_bytes
+        self.queue = queue.Queue()
+        self.pending = {} # {uid: record atau None (dihapus)}
+        self.last_compact = time.time()
+        self.thread = threading.Thread(target=self._run, name="DownloadCheckpointer", daemon=True)
+
+    @staticmethod
+    def replay(journal_path):
+        """Returns {uid: record atau None} dari journal; baris terakhir yang terpotong diabaikan."""
+        changes = {}
+        if not os.path.exists(journal_path): return changes
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try: entry = json.loads(line)
+                except json.JSONDecodeError: break # Crash di tengah penulisan
+                if entry.get('deleted'): changes[entry['uid']] = None
+                else: changes[entry['uid']] = entry
+        return changes
+
+    def start(self, replayed=None):
+        # Perubahan hasil replay langsung dipadatkan di awal
+        if replayed: self.pending.update(replayed)
+        self.thread.start()
+
+    def submit(self, upserts, deleted_uids):
+        if upserts or deleted_uids: self.queue.put((upserts, list(deleted_uids)))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        if self.pending: self._compact()
+        while True:
+            try: batch = self.queue.get(timeout=1.0)
+            except queue.Empty: batch = ()
+            if batch is None: break
+            if batch: self._append(*batch)
+            if self.pending and (time.time() - self.last_compact >= self.compact_interval or
+                                 os.path.getsize(self.journal_path) >= self.max_journal_bytes):
+                self._compact()
+        if self.pending: self._compact()
+
+    def _append(self, upserts, deleted_uids):
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                for record in upserts:
+                    f.write(json.dumps(record) + "\n")
+                    self.pending[record['uid']] = record
+                for uid in deleted_uids:
+                    f.write(json.dumps({'uid': uid, 'deleted': True}) + "\n")
+                    self.pending[uid] = None
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e: print(f"Could not write checkpoint journal: {e}")
+
+    def _compact(self):
+        upserts = [r for r in self.pending.values() if r is not None]
+        deleted = [uid for uid, r in self.pending.items() if r is None]
+        try:
+            self.store.commit_changes(upserts, deleted)
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+            self.pending.clear()
+        except (sqlite3.Error, OSError) as e: print(f"Could not compact checkpoint journal: {e}")
+        self.last_compact = time.time()
+
+CHECKPOINT_INTERVAL_MS = 1000
+
+# --- Load riwayat bertahap di thread latar ---
+class HistoryLoader(QObject):
+    """Membaca riwayat (migrasi JSON + SQLite + replay journal) dan mengirim DownloadItem per batch.
+
+    Item yang belum selesai dikirim lebih dulu supaya bisa langsung di-resume,
+    riwayat FINISHED menyusul.
+    """
+    batch_loaded = Signal(object) # list[DownloadItem]
+    archive_loaded = Signal(object) # DownloadArchive (riwayat FINISHED)
+    finished = Signal(object, object) # DownloadStore, replayed journal
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path, journal_path, json_path):
+        super().__init__()
+        self.db_path = db_path
+        self.journal_path = journal_path
+        self.json_path = json_path
+        self.is_running = True
+
+    def stop(self): self.is_running = False
+
+    @Slot()
+    def run(self):
+        store, replayed = None, {}
+        try:
+            store = DownloadStore(self.db_path)
+            if store.is_empty(): self._migrate_json_list(store)
+            # Replay journal dari sesi yang crash ditulis ke database dulu: upsert mempertahankan rowid,
+            # jadi urutan antrian tetap urutan aslinya (item baru dari journal menyusul di akhir)
+            replayed = DownloadCheckpointer.replay(self.journal_path)
+            if replayed:
+                store.commit_changes([record for record in replayed.values() if record is not None],
+                                     [uid for uid, record in replayed.items() if record is None])
+            batch = []
+            for item_data in store.iter_rows(False):
+                if not self.is_running: return
+                batch.append(DownloadItem.from_dict(item_data))
+                if len(batch) >= self.BATCH_SIZE:
+                    self.batch_loaded.emit(batch)
+                    batch = []
+            if batch: # Item aktif tidak menunggu riwayat lama
+                self.batch_loaded.emit(batch)
+            # Riwayat FINISHED langsung ke kolom archive, tanpa DownloadItem
+            archive = DownloadArchive()
+            for item_data in store.iter_rows(True):
+                if not self.is_running: return
+                archive.append_record(item_data)
+                if len(archive) >= self.BATCH_SIZE:
+                    self.archive_loaded.emit(archive)
+                    archive = DownloadArchive()
+            if len(archive): self.archive_loaded.emit(archive)
+        except (sqlite3.Error, OSError, KeyError) as e: print(f"Could not load download list: {e}")
+        finally:
+            self.finished.emit(store, replayed)
+
+    def _migrate_json_list(self, store):
+        """Migrasi satu kali dari downloads.json versi lama."""
+        if not self.json_path or not os.path.exists(self.json_path): return
+        try:
+            with open(self.json_path, 'r') as f: data = json.load(f)
+            store.commit_changes(data)
+            os.replace(self.json_path, self.json_path + ".migrated")
+            print(f"Migrated {len(data)} downloads from {self.json_path}")
+        except (json.JSONDecodeError, OSError, sqlite3.Error) as e: print(f"Could not migrate download list: {e}")
+SEGMENT_VERIFY_ATTEMPTS = 3
+
+# --- Impor massal (drag & drop banyak URL, paste, file daftar URL) ---
+URL_PATTERN = re.compile(r'(?:https?|ftp)://[^\s<>"\']+')
+
+def extract_urls(text): return [url.rstrip('.,;:!?)]}') for url in URL_PATTERN.findall(text)]
+
+URL_LIST_MAX_BYTES = 16 * 1024 * 1024 # Daftar URL lebih besar dari ini dipotong
+URL_LIST_MAX_LINE = 64 * 1024
+URL_LIST_EXTENSIONS = ('.txt',) # File yang boleh di-drop sebagai daftar URL
+
+def read_url_list(path):
+    """URL dari file daftar, dibaca per baris (baris dibatasi URL_LIST_MAX_LINE) sampai URL_LIST_MAX_BYTES."""
+    urls, total = [], 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in iter(partial(f.readline, URL_LIST_MAX_LINE), ''):
+            total += len(line)
+            if total > URL_LIST_MAX_BYTES:
+                print(f"URL list {path} truncated at {URL_LIST_MAX_BYTES} bytes")
+                break
+            urls.extend(extract_urls(line))
+    return urls
+
+def default_download_path(settings):
+    """Folder download dari pengaturan; kosong (dihapus di Settings) -> ~/Downloads."""
+    return settings.value("default_download_path") or os.path.join(os.path.expanduser("~"), "Downloads")
+
+def unique_filepath(directory, filename, taken, next_suffix):
+    """Path yang belum dipakai item lain (`taken`, ikut diperbarui) maupun file di disk: 'nama (1).ext'.
+
+    `next_suffix` {path: n} mengingat nomor berikutnya, jadi ribuan URL bernama sama tidak kuadratik.
+    """
+    base, ext = os.path.splitext(filename)
+    path = os.path.join(directory, filename)
+    candidate, n = path, next_suffix.get(path, 1)
+    if n > 1: candidate = os.path.join(directory, f"{base} ({n}){ext}")
+    while candidate in taken or os.path.exists(candidate):
+        candidate = os.path.join(directory, f"{base} ({n}){ext}")
+        n += 1
+    next_suffix[path] = n
+    taken.add(candidate)
+    return candidate
+
+class DownloadBatchBuilder(QObject):
+    """Membangun DownloadItem untuk impor massal di thread latar.
+
+    Membaca file daftar URL, menentukan nama file unik dan membuat folder tujuan;
+    GUI thread hanya menerima list item yang sudah jadi untuk disisipkan sekaligus.
+    """
+    finished = Signal(object) # list[DownloadItem]
+
+    def __init__(self, specs, directory, taken_paths, list_path=None):
+        super().__init__()
+        self.specs = specs # [{'url', opsional: 'filepath', 'category', 'splits', 'checksum_algo', 'expected_checksum'}]
+        self.directory = directory
+        self.taken_paths = taken_paths
+        self.list_path = list_path
+
+    @Slot()
+    def run(self):
+        items = []
+        try:
+            specs = self.specs
+            if self.list_path:
+                specs = [{'url': url} for url in read_url_list(self.list_path)]
+            for directory in {os.path.dirname(spec['filepath']) if spec.get('filepath') else self.directory for spec in specs}:
+                os.makedirs(directory, exist_ok=True)
+            next_suffix = {}
+            for spec in specs:
+                url = spec['url']
+                filepath = spec.get('filepath') or unique_filepath(
+                    self.directory, os.path.basename(urlparse(url).path) or "download", self.taken_paths, next_suffix)
+                items.append(DownloadItem(url, filepath, spec.get('category', 'General'), spec.get('splits', 1),
+                                          spec.get('checksum_algo'), spec.get('expected_checksum', '')))
+        except OSError as e:
+            print(f"Could not import download list: {e}")
+        self.finished.emit(items)
+
+# --- Pembagian bandwidth: satu token bucket per item, dibagi adil berbobot ---
+TOKEN_BUCKET_BURST_SECONDS = 0.25
+TOKEN_BUCKET_MAX_SLEEP = 0.25 # Worker yang menunggu memeriksa ulang rate sesering ini
+SHARE_DEMAND_HEADROOM = 1.25 # Item yang tidak tertahan bucket dibatasi di laju aktual x ini; sisanya dibagi ke yang lain
+MIN_BUCKET_RATE = 1024.0 # byte/s; item yang baru tersambung tidak pernah mendapat jatah 0
+
+class TokenBucket:
+    """Token bucket yang dipakai bersama semua koneksi satu item.
+
+    Jatah bandwidth berlaku per item, bukan per koneksi: item 16-split dan item
+    1 koneksi dengan bobot sama mendapat laju yang sama. `rate` 0 = tanpa batas.
+    """
+    __slots__ = ('rate', 'burst', 'tokens', 'stamp', 'lock', 'throttled')
+
+    def __init__(self, rate=0.0):
+        self.lock = threading.Lock()
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.rate = self.burst = 0.0
+        self.throttled = False # Ada worker yang menunggu token sejak dibaca allocator terakhir
+        self.set_rate(rate)
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            if rate == self.rate: return
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = rate
+            self.burst = max(rate * TOKEN_BUCKET_BURST_SECONDS, DOWNLOAD_CHUNK_SIZE)
+            self.tokens = max(min(self.tokens, self.burst), -self.burst) # Utang dari rate lama tidak dibawa penuh
+
+    def take_throttled(self):
+        """True jika ada worker yang tertahan sejak panggilan terakhir atau masih menunggu token."""
+        with self.lock:
+            self._refill(time.monotonic())
+            throttled, self.throttled = self.throttled or self.tokens < 0, False
+        return throttled
+
+    def consume(self, amount, interrupt):
+        """Ambil `amount` byte (boleh berutang) lalu tunggu sampai utangnya lunas atau `interrupt` di-set."""
+        with self.lock:
+            if self.rate <= 0: return
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens < 0: self.throttled = True
+        while True:
+            with self.lock:
+                if self.rate <= 0: return
+                self._refill(time.monotonic())
+                if self.tokens >= 0: return
+                delay = -self.tokens / self.rate
+            if interrupt.wait(min(delay, TOKEN_BUCKET_MAX_SLEEP)): return
+
+def weighted_fair_shares(capacity, weights, demands):
+    """Max-min fair berbobot: bagi `capacity` sebanding `weights`.
+
+    Item dengan demand (byte/s) di bawah jatahnya dibatasi di demand-nya dan
+    sisa kapasitas dibagi ulang ke item lain; demand None = tak terbatas.
+    Kapasitas yang tetap tersisa dibagi ke semua item sebagai ruang tumbuh.
+    """
+    shares = [0.0] * len(weights)
+    pending = set(range(len(weights)))
+    remaining = float(capacity)
+    while pending:
+        total_weight = sum(weights[i] for i in pending)
+        satisfied = [i for i in pending if demands[i] is not None and demands[i] <= remaining * weights[i] / total_weight]
+        if not satisfied:
+            for i in pending: shares[i] = remaining * weights[i] / total_weight
+            return shares
+        for i in satisfied:
+            shares[i] = demands[i]
+            remaining -= demands[i]
+            pending.discard(i)
+    total_weight = sum(weights)
+    if remaining > 0 and total_weight > 0:
+        for i in range(len(shares)): shares[i] += remaining * weights[i] / total_weight
+    return shares
+
 # --- Download Worker (Sekarang lebih fleksibel) ---
+WORKER_EXIT_TIMEOUT_MS = 2000 # Batas tunggu saat keluar; hanya worker yang masih membuka koneksi yang bisa selama ini
+DOWNLOAD_CHUNK_SIZE = 64 * 1024 # Chunk 8 KB -> overhead Python per chunk mendominasi CPU worker (benchmarks/threads_per_core.py)
+
 class DownloadWorker(QObject):
-    """Worker ini bisa menangani download utuh atau sebagian (split/part)."""
+    """Worker ini bisa menangani download utuh atau sebagian (split/part).
+
+    Berjalan di thread sendiri dan hanya memegang state miliknya (file, hasher,
+    flag stop/pause); ke luar hanya lewat sinyal Qt (antrian event) dan
+    SegmentHashChain. Tidak pernah menyentuh state DownloadManager.
+
+    Jumlah byte tidak dikirim lewat sinyal: worker menulis `counters[slot]`
+    (satu penulis per slot) dan manager membacanya dengan laju tetap.
+    """
     started = Signal(str, int) # uid, total_size_for_this_worker
-    progress = Signal(str, int) # uid, downloaded_bytes
     finished = Signal(str) # uid
     error = Signal(str, str) # uid, error_message
+    stopped = Signal(str) # uid; status STOPPED sudah ditetapkan manager saat stop diminta
     status_changed = Signal(str, DownloadStatus)
+    checksum_computed = Signal(str, str) # uid, hexdigest
 
-    def __init__(self, uid, url, filepath, speed_limit_kbps=0, byte_range=None):
+    def __init__(self, uid, url, filepath, bucket=None, byte_range=None,
+                 checksum_algo=None, expected_checksum="", hash_chain=None, part_index=None,
+                 counters=None, slot=0):
         super().__init__()
         self.uid = uid
+        self.counters = counters if counters is not None else array('q', [0]) # Byte tertulis per segmen
+        self.slot = slot
         self.url = url
         self.filepath = filepath
         self.byte_range = byte_range # NEW: (start_byte, end_byte)
         self.is_running = True
         self.is_paused = False
-        self.speed_limit_bytes = (speed_limit_kbps * 1024) if speed_limit_kbps > 0 else 0
+        self.parked = False # True jika transfer terakhir diputus karena pause
+        self.hashed_upto = -1 # Offset yang sudah masuk self.hasher saat parkir
+        self.resume_event = threading.Event() # Di-set = boleh jalan; thread yang di-pause menunggu di sini
+        self.resume_event.set()
+        self.interrupt = threading.Event() # Di-set oleh stop/pause: membangunkan tunggu token bucket
+        self.aborted = False # Socket request ini di-shutdown oleh stop/pause; tidak di-reset oleh resume()
+        self.response = None # Respons yang sedang dibaca; socket-nya di-shutdown oleh stop/pause
+        self.bucket = bucket # TokenBucket milik item (dipakai bersama semua part); rate diatur manager
+        # Integrity: mode single meng-hash langsung per chunk, mode split lewat SegmentHashChain
+        self.checksum_algo = checksum_algo
+        self.expected_checksum = expected_checksum
+        self.hash_chain = hash_chain
+        self.part_index = part_index
+        self.hasher = None
+        self.server_digests = {} # Digest seluruh file dari header server
+        self.segment_attempts = 0
+
+    def _finish_part(self):
+        if self.hash_chain is not None:
+            self.hash_chain.part_done(self.part_index)
+        self.status_changed.emit(self.uid, DownloadStatus.FINISHED)
+        self.finished.emit(self.uid)
+
+    def _finish_single(self):
+        """Selesai untuk mode single: cek checksum dulu sebelum FINISHED."""
+        if self.hasher and self.checksum_algo:
+            digest = self.hasher.hexdigest(self.checksum_algo)
+            self.checksum_computed.emit(self.uid, digest)
+            if self.expected_checksum and digest != self.expected_checksum:
+                self._fail_corrupt(checksum_mismatch_message(self.checksum_algo, self.expected_checksum, digest))
+                return
+        if self.hasher and self.server_digests:
+            mismatch = find_digest_mismatch(self.hasher, self.server_digests, "Server")
+            if mismatch:
+                self._fail_corrupt(mismatch)
+                return
+        self.status_changed.emit(self.uid, DownloadStatus.FINISHED)
+        self.finished.emit(self.uid)
+
+    def _fail_corrupt(self, message):
+        """File lengkap tapi isinya salah: hapus, agar retry mengambil ulang dari awal
+        (bukan Range dari ukuran file -> 416 -> hash byte yang sama lagi)."""
+        try: os.remove(self.filepath)
+        except OSError as e: print(f"Could not delete corrupt file {self.filepath}: {e}")
+        self.hasher = None
+        self.error.emit(self.uid, message)
+
+    def _finish(self):
+        if self.byte_range: self._finish_part()
+        else: self._finish_single()
 
     @Slot()
     def run(self):
+        while True:
+            refetch = self._run_once()
+            if self.parked:
+                # Koneksi sudah ditutup; tunggu resume/stop tanpa polling, lalu lanjut dengan Range dari offset file
+                self.resume_event.wait()
+                self.parked = False
+                if not self.is_running:
+                    self.stopped.emit(self.uid)
+                    return
+                continue
+            if not refetch: return
+            self.segment_attempts += 1 # Part yang body-nya tidak cocok dengan digest server diambil ulang
+
+    def _run_once(self):
+        """Returns True jika range ini harus di-fetch ulang."""
         try:
             resume_byte_pos = 0
             headers = {}
@@ -176,20 +1097,27 @@ class DownloadWorker(QObject):
             # Resume logic
             if os.path.exists(self.filepath):
                 resume_byte_pos = os.path.getsize(self.filepath)
+            self.counters[self.slot] = resume_byte_pos
 
             # Split download logic
+            if self.hash_chain is not None: self.hash_chain.sync_part(self.part_index, resume_byte_pos)
             if self.byte_range:
                 # Untuk split download, start_byte-nya harus di-offset dengan yang sudah di-download
                 start_byte = self.byte_range[0] + resume_byte_pos
                 end_byte = self.byte_range[1]
-                if start_byte >= end_byte: # Part ini sudah selesai
+                if start_byte > end_byte: # Part ini sudah selesai (range inklusif)
+                    if self.hash_chain is not None:
+                        self.hash_chain.part_done(self.part_index)
                     self.finished.emit(self.uid)
                     return
                 headers['Range'] = f'bytes={start_byte}-{end_byte}'
             elif resume_byte_pos > 0:
                 headers['Range'] = f'bytes={resume_byte_pos}-'
 
+            self.aborted = False # Request baru; abort milik request sebelumnya tidak berlaku lagi
             with requests.get(self.url, stream=True, timeout=30, headers=headers) as r:
+                self.response = r
+                if self.interrupt.is_set(): self._abort_transfer() # stop/pause datang saat koneksi dibuka
                 r.raise_for_status()
                 
                 # Menentukan total size
@@ -203,259 +1131,1637 @@ class DownloadWorker(QObject):
                     resume_byte_pos = 0 # Bukan resume, mulai dari awal
                     total_size = int(r.headers.get('content-length', 0))
 
-                self.started.emit(self.uid, total_size)
-                self.status_changed.emit(self.uid, DownloadStatus.DOWNLOADING)
+                representation_digests, content_digests = parse_server_digests(r.headers)
+                body_digests = {}
+                if is_range_response or self.byte_range:
+                    body_digests = content_digests # Digest hanya untuk range ini
+                else:
+                    representation_digests = {**content_digests, **representation_digests}
+                body_hasher = MultiHasher(list(body_digests))
+
+                if not self.byte_range:
+                    self.server_digests = representation_digests
+                    algos = [self.checksum_algo] if self.checksum_algo else []
+                    algos += [a for a in representation_digests if a not in algos]
+                    if self.hasher is not None and self.hashed_upto == resume_byte_pos and list(self.hasher.hashers) == algos:
+                        pass # Lanjut setelah pause: state hash masih cocok dengan isi file, tidak perlu baca ulang
+                    else:
+                        self.hasher = MultiHasher(algos)
+                        if self.hasher and resume_byte_pos > 0: # Hash bagian yang sudah ada di disk
+                            hash_file_into(self.hasher, self.filepath, resume_byte_pos)
+
+                if self.is_running: # Sudah di-stop saat header datang: item mungkin sudah kembali ke antrian
+                    self.started.emit(self.uid, total_size)
+                    if not self.is_paused: self.status_changed.emit(self.uid, DownloadStatus.DOWNLOADING)
                 downloaded_size = resume_byte_pos
+                self.counters[self.slot] = downloaded_size
                 
-                with open(self.filepath, 'ab') as f:
-                    start_time = time.time()
-                    bytes_since_last_check = 0
-                    for chunk in r.iter_content(chunk_size=8192):
-                        while self.is_paused:
-                            if not self.is_running: break
-                            time.sleep(0.5)
+                # Server mengabaikan Range (200) -> tulis ulang dari awal, jangan append
+                file_mode = 'ab' if (self.byte_range or resume_byte_pos > 0) else 'wb'
+                with open(self.filepath, file_mode) as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if self.is_paused and self.is_running:
+                            self.parked = True # Keluar dari `with` -> respons (dan socket) ditutup
+                            self.hashed_upto = downloaded_size
+                            break
                         if not self.is_running or not chunk: break
                         
                         f.write(chunk)
+                        if self.hash_chain is not None:
+                            f.flush() # Chunk harus sudah di disk sebelum chain bisa mengejarnya dari file
+                            self.hash_chain.feed(self.part_index, chunk)
+                        if self.hasher: self.hasher.update(chunk)
+                        if body_hasher: body_hasher.update(chunk)
                         chunk_len = len(chunk)
                         downloaded_size += chunk_len
-                        bytes_since_last_check += chunk_len
-                        # Mengirim progress (total bytes yang sudah di-download untuk part ini)
-                        self.progress.emit(self.uid, downloaded_size)
+                        self.counters[self.slot] = downloaded_size # Dibaca manager via sample_progress
                         
-                        # Speed limit logic
-                        if self.speed_limit_bytes > 0:
-                            elapsed_time = time.time() - start_time
-                            if elapsed_time > 0:
-                                current_speed = bytes_since_last_check / elapsed_time
-                                if current_speed > self.speed_limit_bytes:
-                                    sleep_time = (bytes_since_last_check / self.speed_limit_bytes) - elapsed_time
-                                    if sleep_time > 0:
-                                        time.sleep(sleep_time)
-                            if elapsed_time >= 1.0:
-                                start_time = time.time()
-                                bytes_since_last_check = 0
+                        # Speed limit: jatah item di token bucket bersama (lihat DownloadManager.allocate_bandwidth)
+                        if self.bucket is not None: self.bucket.consume(chunk_len, self.interrupt)
 
+            # Body terputus oleh pause, bukan selesai (juga jika sudah di-resume sebelum read yang putus kembali)
+            if (self.is_paused or self.aborted) and self.is_running: self.parked = True
+            if self.parked: return False
             if self.is_running:
-                self.status_changed.emit(self.uid, DownloadStatus.FINISHED)
-                self.finished.emit(self.uid)
+                mismatch = find_digest_mismatch(body_hasher, body_digests, "Range") if body_hasher else None
+                if mismatch:
+                    if self.byte_range and self.segment_attempts < SEGMENT_VERIFY_ATTEMPTS:
+                        print(f"{self.uid}: {mismatch}. Re-fetching range.")
+                        with open(self.filepath, 'r+b') as f: f.truncate(resume_byte_pos)
+                        return True
+                    self.error.emit(self.uid, mismatch)
+                    return False
+                self._finish()
             else:
-                 self.status_changed.emit(self.uid, DownloadStatus.STOPPED)
+                 self.stopped.emit(self.uid)
 
         except requests.exceptions.HTTPError as e:
              if e.response.status_code == 416: # Range Not Satisfiable
-                self.status_changed.emit(self.uid, DownloadStatus.FINISHED)
-                self.finished.emit(self.uid)
+                if self.checksum_algo and not self.byte_range and os.path.exists(self.filepath):
+                    # File sudah lengkap di disk, verifikasi isinya
+                    self.hasher = MultiHasher([self.checksum_algo])
+                    hash_file_into(self.hasher, self.filepath)
+                self._finish()
              else:
                 self.error.emit(self.uid, f"HTTP Error: {e}")
         except Exception as e:
-            self.error.emit(self.uid, str(e))
+            if self.aborted or self.interrupt.is_set(): self._interrupted() # Socket di-shutdown oleh stop()/pause()
+            else: self.error.emit(self.uid, str(e))
+        finally:
+            self.response = None
+        return False
+
+    def _interrupted(self):
+        if not self.is_running: self.stopped.emit(self.uid)
+        else: self.parked = True # Sudah di-resume: resume_event ter-set, run() langsung lanjut lewat Range
+
+    # Dipanggil dari thread manager; status item ditetapkan manager sendiri
+    def stop(self):
+        self.is_running = False
+        self.resume_event.set() # Bangunkan worker yang sedang parkir
+        self._abort_transfer()
+    def pause(self):
+        self.is_paused = True
+        self.resume_event.clear()
+        self._abort_transfer()
+    def resume(self):
+        self.is_paused = False
+        self.interrupt.clear()
+        self.resume_event.set()
+
+    def _abort_transfer(self):
+        """Shutdown socket respons aktif dari thread pemanggil: read yang sedang blok (server macet)
+        langsung kembali, tidak menunggu timeout. Socket tetap ditutup oleh thread worker sendiri."""
+        self.interrupt.set()
+        response = self.response
+        connection = getattr(response.raw, 'connection', None) if response is not None else None
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            self.aborted = True
+            try: sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass # Sudah ditutup worker
+
+# --- Verifikasi Manifest (paralel di process pool) ---
+class ManifestVerifier(QObject):
+    progress = Signal(str, int) # uid, percent
+    file_verified = Signal(str, str, str, str) # uid, algo, hexdigest, error_message
+    finished = Signal()
+
+    def __init__(self, jobs, max_workers=None):
+        super().__init__()
+        self.jobs = jobs # [(uid, filepath, algo)]
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def _create_pool(self):
+        """Returns (executor, progress_queue): thread pool di build free-threaded, process pool jika ada GIL."""
+        if FREE_THREADED:
+            progress_queue = queue.SimpleQueue()
+            _init_hash_process(progress_queue)
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ManifestHash"), progress_queue
+        # spawn: fork dari proses yang punya thread Qt aktif rawan deadlock
+        mp_context = multiprocessing.get_context("spawn")
+        progress_queue = mp_context.Queue()
+        pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context,
+                                   initializer=_init_hash_process, initargs=(progress_queue,))
+        return pool, progress_queue
 
-    def stop(self): self.is_running = False
-    def toggle_pause(self):
-        self.is_paused = not self.is_paused
-        new_status = DownloadStatus.PAUSED if self.is_paused else DownloadStatus.DOWNLOADING
-        self.status_changed.emit(self.uid, new_status)
+    @Slot()
+    def run(self):
+        pool, progress_queue = self._create_pool()
+        try:
+            with pool:
+                pending = {pool.submit(hash_file_mmap, uid, path, algo): (uid, algo) for uid, path, algo in self.jobs}
+                while pending:
+                    done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    self._drain_progress(progress_queue)
+                    for future in done:
+                        uid, algo = pending.pop(future)
+                        try:
+                            _, digest = future.result()
+                            self.file_verified.emit(uid, algo, digest, "")
+                        except Exception as e:
+                            self.file_verified.emit(uid, algo, "", str(e))
+        finally:
+            if FREE_THREADED: _init_hash_process(None)
+            else: progress_queue.close()
+            self.finished.emit()
+
+    def _drain_progress(self, progress_queue):
+        latest = {}
+        while True:
+            try: uid, done_bytes, size = progress_queue.get_nowait()
+            except queue.Empty: break
+            latest[uid] = int(done_bytes * 100 / size) if size else 100
+        for uid, percent in latest.items():
+            self.progress.emit(uid, percent)
+
+# --- Finalisasi split download (merge, verifikasi, rename, hapus part) ---
+MERGE_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_MAX_FINALIZATIONS = 1 # Merge paralel di disk yang sama hanya saling menghambat
+
+class DownloadFinalizer(QObject):
+    """Pool thread terbatas untuk tahap akhir split download.
+
+    Part digabung ke `<file>.merging` per chunk, diverifikasi, lalu di-rename
+    ke nama akhir; part baru dihapus setelah rename berhasil, jadi merge yang
+    dibatalkan/gagal bisa diulang. Checksum yang tidak cocok tidak pernah
+    sampai ke nama akhir: hasil merge dan part dihapus (seperti _fail_corrupt
+    mode single) agar retry mengambil ulang dari awal. Jika hash chain belum
+    lengkap, hash dihitung dari chunk yang sedang disalin (tanpa membaca ulang file hasil).
+    """
+    progress = Signal(str, int) # uid, percent
+    finished = Signal(str, str, str) # uid, checksum, error_message ("" = sukses)
+
+    def __init__(self, max_workers=DEFAULT_MAX_FINALIZATIONS):
+        super().__init__()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="DownloadFinalizer")
+        self.cancel_events = {} # {uid: threading.Event}; hanya disentuh di thread GUI
+
+    def submit(self, uid, filepath, part_paths, hash_chain, algos, checksum_algo, expected_checksum, server_digests):
+        cancel = self.cancel_events[uid] = threading.Event()
+        self.pool.submit(self._run, uid, filepath, part_paths, hash_chain, algos, checksum_algo,
+                         expected_checksum, server_digests, cancel)
+
+    def cancel(self, uid):
+        cancel = self.cancel_events.get(uid)
+        if cancel is not None: cancel.set()
+
+    def shutdown(self):
+        for cancel in self.cancel_events.values(): cancel.set()
+        self.pool.shutdown(wait=True)
+
+    def _run(self, uid, filepath, part_paths, hash_chain, algos, checksum_algo, expected_checksum, server_digests, cancel):
+        temp_path = filepath + ".merging"
+        try:
+            total = sum(os.path.getsize(path) for path in part_paths)
+            hasher = hash_chain.hasher if hash_chain is not None and hash_chain.is_complete() else None
+            rehash = MultiHasher(algos) if hasher is None and algos else None
+            merged, last_percent = 0, -1
+            with open(temp_path, 'wb') as dest_file:
+                for path in part_paths:
+                    with open(path, 'rb') as src_file:
+                        while chunk := src_file.read(MERGE_CHUNK_SIZE):
+                            if cancel.is_set():
+                                raise InterruptedError("Finalization cancelled")
+                            dest_file.write(chunk)
+                            if rehash is not None: rehash.update(chunk)
+                            merged += len(chunk)
+                            percent = int(merged * 100 / total) if total else 100
+                            if percent != last_percent:
+                                last_percent = percent
+                                self.progress.emit(uid, percent)
+            hasher = hasher or rehash
+            checksum, mismatch = "", None
+            if hasher is not None:
+                mismatch = find_digest_mismatch(hasher, server_digests or {}, "Server")
+                if checksum_algo:
+                    checksum = hasher.hexdigest(checksum_algo)
+                    if expected_checksum and checksum != expected_checksum:
+                        mismatch = checksum_mismatch_message(checksum_algo, expected_checksum, checksum)
+            if mismatch: # Isi part salah: merge ulang hanya menghasilkan byte yang sama
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, filepath)
+            for path in part_paths: os.remove(path)
+            self.finished.emit(uid, checksum, mismatch or "")
+        except Exception as e:
+            if os.path.exists(temp_path):
+                try: os.remove(temp_path)
+                except OSError: pass
+            self.finished.emit(uid, "", str(e) if isinstance(e, InterruptedError) else f"Merge failed: {e}")
 
 # --- Model/View Architecture ---
+FILE_RECONCILE_INTERVAL_MS = 30000
+
+class FileExistenceReconciler(QObject):
+    """Thread latar yang mengecek keberadaan file FINISHED di luar paint path.
+
+    GUI hanya mengirim snapshot [(uid, filepath)] lewat `submit()` (non-blocking);
+    stat dilakukan di thread ini (aman untuk network share yang lambat) dan yang
+    dikirim balik hanya selisih terhadap scan sebelumnya.
+    """
+    missing_changed = Signal(object, object) # uid yang baru hilang, uid yang muncul kembali
+
+    def __init__(self):
+        super().__init__()
+        self.queue = queue.Queue()
+        self.missing = set() # Hanya disentuh oleh thread latar
+        self.thread = threading.Thread(target=self._run, name="FileExistenceReconciler", daemon=True)
+        self.thread.start()
+
+    def submit(self, entries): self.queue.put(entries)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            entries = self.queue.get()
+            try:
+                while entries is not None: entries = self.queue.get_nowait() # Snapshot lama dilewati
+            except queue.Empty: pass
+            if entries is None: break
+            missing = {uid for uid, filepath in entries if not os.path.exists(filepath)}
+            gone, back = missing - self.missing, self.missing - missing
+            self.missing = missing
+            if gone or back: self.missing_changed.emit(gone, back)
+
+SORT_ROLE = Qt.UserRole + 1 # Nilai mentah (angka) untuk sorting, bukan string tampilan
+SEGMENTS_ROLE = Qt.UserRole + 2 # Progress per part untuk split download (kolom Progress)
+THROUGHPUT_ROLE = Qt.UserRole + 3 # ThroughputHistory item (kolom Activity)
+ETA_UNKNOWN = float('inf')
+
 class DownloadTableModel(QAbstractTableModel):
-    def __init__(self, data):
+    decorations_changed = Signal() # Ikon/keberadaan file berubah -> view cukup repaint
+
+    def __init__(self, data, archive=None):
         super().__init__()
         self._data = data
-        self.headers = ["Name", "Total Size", "Progress", "Status", "Speed", "Connections", "Category"]
+        self._archive = archive if archive is not None else DownloadArchive() # Baris setelah item live
+        self.headers = ["Name", "Total Size", "Progress", "Status", "Speed", "Connections", "Category", "Time Left", "Date Added", "Activity"]
         self.icon_provider = QFileIconProvider()
         self.generic_file_icon = QApplication.style().standardIcon(QStyle.SP_FileIcon)
+        self._icon_cache = {}   # {ekstensi: QIcon}
+        self._icon_pending = {} # {ekstensi: contoh filepath}, di-resolve setelah paint
+        self._missing_files = set() # uid FINISHED yang file-nya tidak ada (dari reconciler)
+        self.file_reconciler = FileExistenceReconciler()
+        self.file_reconciler.missing_changed.connect(self.on_missing_files_changed)
+        self.reconcile_timer = QTimer(self)
+        self.reconcile_timer.timeout.connect(self.reconcile_files)
+        self.reconcile_timer.start(FILE_RECONCILE_INTERVAL_MS)
+        self._live_rows = None # {uid: row} untuk item live, dibangun ulang setelah insert/remove
+        self.rowsInserted.connect(self._invalidate_rows)
+        self.rowsRemoved.connect(self._invalidate_rows)
+        self.modelReset.connect(self._invalidate_rows)
+
+    def _invalidate_rows(self, *args): self._live_rows = None
+
+    def row_of_uid(self, uid):
+        if self._live_rows is None: self._live_rows = {item.uid: i for i, item in enumerate(self._data)}
+        row = self._live_rows.get(uid)
+        if row is None:
+            archive_row = self._archive.row_of(uid)
+            if archive_row is not None: row = len(self._data) + archive_row
+        return row
+
+    @Slot(str)
+    def refresh_uid(self, uid):
+        """dataChanged hanya untuk satu baris -> proxy cukup memindahkan baris itu."""
+        row = self.row_of_uid(uid)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+    @Slot(object)
+    def refresh_item(self, item):
+        if item.status == DownloadStatus.FINISHED: self._missing_files.discard(item.uid) # Baru ditulis
+        self.refresh_uid(item.uid)
+
+    # --- Ikon & keberadaan file ---
+    def file_icon(self, filepath):
+        """Ikon per ekstensi dari cache; miss -> ikon generik dulu, lookup dijadwalkan sesudah paint."""
+        ext = os.path.splitext(filepath)[1].lower()
+        icon = self._icon_cache.get(ext)
+        if icon is not None: return icon
+        if not self._icon_pending: QTimer.singleShot(0, self._resolve_icons)
+        self._icon_pending.setdefault(ext, filepath)
+        return self.generic_file_icon
+
+    def _resolve_icons(self):
+        # QFileIconProvider hanya aman di GUI thread; yang dihindari adalah lookup per paint
+        pending, self._icon_pending = self._icon_pending, {}
+        for ext, filepath in pending.items():
+            self._icon_cache[ext] = self.icon_provider.icon(QFileInfo(filepath))
+        self.decorations_changed.emit()
+
+    @Slot()
+    def reconcile_files(self, *args):
+        entries = [(item.uid, item.filepath) for item in self._data if item.status == DownloadStatus.FINISHED]
+        entries.extend(zip(self._archive.uids, self._archive.filepaths))
+        self.file_reconciler.submit(entries)
+
+    @Slot(object, object)
+    def on_missing_files_changed(self, gone, back):
+        self._missing_files.difference_update(back)
+        self._missing_files.update(gone)
+        self.decorations_changed.emit()
+
+    def shutdown(self):
+        self.reconcile_timer.stop()
+        self.file_reconciler.close()
+
+    def filter_fields(self, row):
+        """(uid, filename, status tampilan) untuk indeks filter di proxy; item yang di-merge/verify masuk "Finalizing"."""
+        if row >= len(self._data):
+            row -= len(self._data)
+            return self._archive.uids[row], self._archive.filenames[row], DownloadStatus.FINISHED.value
+        item = self._data[row]
+        return item.uid, item.filename, item.display_status
+
+    def sort_key(self, row, col):
+        """Nilai mentah untuk sorting; dipanggil langsung oleh proxy tanpa lewat QVariant."""
+        if row >= len(self._data):
+            archive = self._archive
+            row -= len(self._data)
+            if col == 0: return archive.filenames[row].lower()
+            if col == 1: return archive.total_sizes[row]
+            if col == 2: return archive.verify_progress.get(archive.uids[row], 100)
+            if col == 3: return DownloadStatus.FINISHED.value
+            if col == 5: return archive.splits[row]
+            if col == 6: return archive.categories[row]
+            if col == 8: return archive.added_ts[row]
+            return 0
+        item = self._data[row]
+        if col == 0: return item.filename.lower()
+        if col == 1: return item.total_size
+        if col == 2: return item.display_progress
+        if col == 3: return item.display_status
+        if col == 4: return item.speed_bps
+        if col == 5: return item.splits
+        if col == 6: return item.category
+        if col == 7: return item.eta_seconds if item.eta_seconds is not None else ETA_UNKNOWN
+        if col == 8: return item.added_ts
+        if col == 9: return item.throughput.latest() if item.throughput is not None else 0.0
+        return 0
 
     def data(self, index, role):
         if not index.isValid(): return None
-        item = self._data[index.row()]
+        row = index.row()
+        if row >= len(self._data):
+            return self._archived_data(row - len(self._data), index.column(), role)
+        item = self._data[row]
         col = index.column()
 
         if role == Qt.DecorationRole and col == 0:
-            if item.status == DownloadStatus.FINISHED and os.path.exists(item.filepath):
-                return self.icon_provider.icon(QFileInfo(item.filepath))
+            if item.status == DownloadStatus.FINISHED and item.uid not in self._missing_files:
+                return self.file_icon(item.filepath)
             else:
                 return self.generic_file_icon
 
+        if role == Qt.ToolTipRole and col == 3 and item.error_message:
+            return item.error_message
+
+        if role == SORT_ROLE: return self.sort_key(row, col)
+        if role == SEGMENTS_ROLE and col == 2: return item.segment_progress
+        if role == THROUGHPUT_ROLE and col == 9: return item.throughput
+
         if role == Qt.DisplayRole:
             if col == 0: return item.filename
             if col == 1: return format_size(item.total_size) if item.total_size > 0 else "..."
-            if col == 2: return item.progress
-            if col == 3: return item.status.value
-            if col == 4: return item.speed
+            if col == 2: return item.display_progress
+            if col == 3: return item.display_status
+            if col == 4:
+                if item.finalize_progress is not None: return "Finalizing..."
+                return item.speed if item.verify_progress is None else "Verifying..."
             if col == 5: return item.splits # Menampilkan jumlah split
             if col == 6: return item.category
+            if col == 7: return item.time_left
+            if col == 8: return item.date_added
         return None
-    def rowCount(self, index): return len(self._data)
+
+    def _archived_data(self, row, col, role):
+        """Baca langsung dari kolom DownloadArchive (semua baris berstatus FINISHED)."""
+        archive = self._archive
+        if role == Qt.DecorationRole and col == 0:
+            if archive.uids[row] in self._missing_files: return self.generic_file_icon
+            return self.file_icon(archive.filepaths[row])
+        if role == SORT_ROLE: return self.sort_key(row + len(self._data), col)
+        if role == Qt.DisplayRole:
+            if col == 0: return archive.filenames[row]
+            if col == 1:
+                size = archive.total_sizes[row]
+                return format_size(size) if size > 0 else "..."
+            if col == 2: return archive.verify_progress.get(archive.uids[row], 100)
+            if col == 3: return DownloadStatus.FINISHED.value
+            if col == 4: return "Verifying..." if archive.uids[row] in archive.verify_progress else "N/A"
+            if col == 5: return archive.splits[row]
+            if col == 6: return archive.categories[row]
+            if col == 7: return "N/A"
+            if col == 8: return format_date_added(archive.added_ts[row])
+        return None
+
+    def rowCount(self, index): return len(self._data) + len(self._archive)
     def columnCount(self, index): return len(self.headers)
     def headerData(self, section, orientation, role):
         if role == Qt.DisplayRole and orientation == Qt.Horizontal: return self.headers[section]
         return None
 
-class CustomFilterProxyModel(QSortFilterProxyModel):
-    # ... (Tidak ada perubahan)
+class FilterIndex:
+    """Indeks filter per uid: nama lowercase & status di-cache, status -> set(uid).
+
+    Pencarian substring memakai satu string gabungan semua nama lowercase (dipisah newline)
+    plus array offset awal tiap nama: str.find berjalan di C, bisect memetakan hit ke uid.
+    Dibangun ulang secara lazy hanya saat nama berubah, jauh lebih hemat memori daripada
+    posting list trigram per uid.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.names = {}     # uid -> (filename, filename.lower())
+        self.statuses = {}  # uid -> status
+        self.by_status = {} # status -> set(uid)
+        self._blob = None
+        self._blob_uids = []
+        self._blob_starts = array('q')
+
+    def add(self, uid, filename, status):
+        self.names[uid] = (filename, filename.lower())
+        self.statuses[uid] = status
+        self.by_status.setdefault(status, set()).add(uid)
+        self._blob = None
+
+    def discard(self, uid):
+        if self.names.pop(uid, None) is None: return
+        self.by_status[self.statuses.pop(uid)].discard(uid)
+        self._blob = None
+
+    def update(self, uid, filename, status):
+        """Returns True jika status berubah (jumlah per status ikut berubah)."""
+        old_status = self.statuses.get(uid)
+        if old_status == status and self.names[uid][0] == filename: return False
+        if self.names[uid][0] != filename:
+            self.names[uid] = (filename, filename.lower())
+            self._blob = None
+        if old_status != status:
+            self.by_status[old_status].discard(uid)
+            self.by_status.setdefault(status, set()).add(uid)
+            self.statuses[uid] = status
+        return old_status != status
+
+    def accepts(self, uid, status, text):
+        return (not status or self.statuses[uid] == status) and (not text or text in self.names[uid][1])
+
+    def _search(self, text):
+        if self._blob is None:
+            self._blob_uids = list(self.names)
+            lowers = [self.names[uid][1] for uid in self._blob_uids]
+            self._blob_starts, pos = array('q'), 0
+            for lower in lowers:
+                self._blob_starts.append(pos)
+                pos += len(lower) + 1
+            self._blob = '\n'.join(lowers)
+        blob, starts, uids = self._blob, self._blob_starts, self._blob_uids
+        hits, pos = [], blob.find(text)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            hits.append(uids[i])
+            pos = blob.find(text, starts[i + 1]) if i + 1 < len(starts) else -1 # Lompat ke nama berikutnya
+        return hits
+
+    def match(self, status, text):
+        """Set uid yang lolos filter (status kosong = semua)."""
+        candidates = self.by_status.get(status, set()) if status else None
+        if not text: return set(candidates) if candidates is not None else set(self.names)
+        if candidates is not None and len(candidates) * 8 < len(self.names):
+            names = self.names
+            return {uid for uid in candidates if text in names[uid][1]}
+        hits = self._search(text)
+        return set(hits) if candidates is None else candidates.intersection(hits)
+
+    def counts(self): return {status: len(uids) for status, uids in self.by_status.items()}
+
+class CustomFilterProxyModel(QAbstractProxyModel):
+    """Filter + sort di Python. QSortFilterProxyModel memanggil data() (Python) untuk setiap
+    perbandingan; di sini kunci diambil sekali per baris dan update hanya memindahkan baris yang berubah."""
+    status_counts_changed = Signal(object) # {status: jumlah}, untuk sidebar
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._status_filter = ""
+        self._status_filter = "" # "" = All
         self._text_filter = ""
+        self._index = FilterIndex()
+        self._rows = []       # baris proxy -> baris source
+        self._proxy_of = []   # baris source -> baris proxy (-1 = tersaring)
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._pending_reset = False
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.dataChanged.connect(self._on_source_data_changed)
+        model.rowsInserted.connect(self._on_source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_source_rows_removed)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.layoutChanged.connect(self._relayout)
+        self.beginResetModel()
+        self._reindex_filter()
+        self._rebuild()
+        self.endResetModel()
+
+    def status_counts(self): return self._index.counts()
 
     def set_status_filter(self, status):
-        self._status_filter = status
+        self._status_filter = "" if status == "All" else status
         self.invalidateFilter()
 
     def set_text_filter(self, text):
         self._text_filter = text.lower()
         self.invalidateFilter()
 
+    def invalidateFilter(self):
+        self.beginResetModel()
+        self._rebuild()
+        self.endResetModel()
+
     def filterAcceptsRow(self, source_row, source_parent):
-        filename_index = self.sourceModel().index(source_row, 0, source_parent)
-        status_index = self.sourceModel().index(source_row, 3, source_parent)
-        filename = self.sourceModel().data(filename_index, Qt.DisplayRole)
-        status = self.sourceModel().data(status_index, Qt.DisplayRole)
-        status_ok = True
-        if self._status_filter and self._status_filter != "All":
-            status_ok = (status == self._status_filter)
-        text_ok = True
-        if self._text_filter:
-            text_ok = self._text_filter in filename.lower()
-        return status_ok and text_ok
+        uid = self.sourceModel().filter_fields(source_row)[0]
+        return self._index.accepts(uid, self._status_filter, self._text_filter)
+
+    def _reindex_filter(self):
+        self._index.clear()
+        source = self.sourceModel()
+        for row in range(source.rowCount(QModelIndex())):
+            self._index.add(*source.filter_fields(row))
+        self.status_counts_changed.emit(self._index.counts())
+
+    # --- Mapping ---
+    def _accepts(self, source_row): return self.filterAcceptsRow(source_row, QModelIndex())
+
+    def _key(self, source_row):
+        # Baris source sebagai tie-breaker -> urutan stabil & deterministik
+        return (self.sourceModel().sort_key(source_row, self._sort_column), source_row)
+
+    def _reindex(self, start=0, stop=None):
+        proxy_of = self._proxy_of
+        for i, source_row in enumerate(self._rows[start:stop], start):
+            proxy_of[source_row] = i
+
+    def _rebuild(self):
+        source = self.sourceModel()
+        n = source.rowCount(QModelIndex()) if source is not None else 0
+        self._proxy_of = [-1] * n
+        if self._text_filter or self._status_filter:
+            # Set status + pencarian blob nama (str.find + bisect) -> uid -> baris source
+            row_of_uid = source.row_of_uid
+            self._rows = sorted(row_of_uid(uid) for uid in self._index.match(self._status_filter, self._text_filter))
+        else:
+            self._rows = list(range(n))
+        if self._sort_column >= 0:
+            self._rows.sort(key=self._key, reverse=self._sort_order == Qt.DescendingOrder)
+        self._reindex()
+
+    def _insert_position(self, source_row):
+        """Binary search posisi baris source pada self._rows (yang belum memuatnya)."""
+        rows = self._rows
+        if self._sort_column < 0: return bisect_left(rows, source_row)
+        key, descending = self._key(source_row), self._sort_order == Qt.DescendingOrder
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = self._key(rows[mid])
+            if (mid_key > key) if descending else (mid_key < key): lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def _in_order(self, proxy_row):
+        rows = self._rows
+        if self._sort_column < 0: return True
+        key, descending = self._key(rows[proxy_row]), self._sort_order == Qt.DescendingOrder
+        if proxy_row > 0:
+            prev = self._key(rows[proxy_row - 1])
+            if (prev < key) if descending else (prev > key): return False
+        if proxy_row + 1 < len(rows):
+            nxt = self._key(rows[proxy_row + 1])
+            if (nxt > key) if descending else (nxt < key): return False
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column, self._sort_order = column, order
+        self._relayout()
+
+    def _relayout(self, *args):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [(self._rows[i.row()], i.column()) for i in persistent]
+        self._rebuild()
+        self.changePersistentIndexList(persistent, [
+            self.index(self._proxy_of[r], c) if r < len(self._proxy_of) and self._proxy_of[r] >= 0 else QModelIndex()
+            for r, c in sources])
+        self.layoutChanged.emit()
+
+    # --- Sinyal dari source ---
+    def _on_source_reset(self):
+        self._reindex_filter()
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        source, counts_changed = self.sourceModel(), False
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            counts_changed |= self._index.update(*source.filter_fields(source_row))
+            self._update_source_row(source_row)
+        if counts_changed: self.status_counts_changed.emit(self._index.counts())
+
+    def _update_source_row(self, source_row):
+        proxy_row, accepted = self._proxy_of[source_row], self._accepts(source_row)
+        if proxy_row < 0:
+            if accepted:
+                pos = self._insert_position(source_row)
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self._rows.insert(pos, source_row)
+                self._reindex(pos)
+                self.endInsertRows()
+            return
+        if not accepted:
+            self.beginRemoveRows(QModelIndex(), proxy_row, proxy_row)
+            del self._rows[proxy_row]
+            self._proxy_of[source_row] = -1
+            self._reindex(proxy_row)
+            self.endRemoveRows()
+            return
+        if not self._in_order(proxy_row):
+            del self._rows[proxy_row]
+            pos = self._insert_position(source_row)
+            self._rows.insert(proxy_row, source_row)
+            if pos != proxy_row:
+                # destinationChild memakai penomoran sebelum baris dipindah
+                self.beginMoveRows(QModelIndex(), proxy_row, proxy_row, QModelIndex(), pos if pos < proxy_row else pos + 1)
+                del self._rows[proxy_row]
+                self._rows.insert(pos, source_row)
+                self._reindex(min(pos, proxy_row), max(pos, proxy_row) + 1)
+                self.endMoveRows()
+                proxy_row = pos
+        self.dataChanged.emit(self.index(proxy_row, 0), self.index(proxy_row, self.columnCount() - 1))
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        count = last - first + 1
+        source = self.sourceModel()
+        for row in range(first, last + 1): self._index.add(*source.filter_fields(row))
+        self.status_counts_changed.emit(self._index.counts())
+        self._rows = [r + count if r >= first else r for r in self._rows]
+        self._proxy_of[first:first] = [-1] * count
+        new_rows = [r for r in range(first, last + 1) if self._accepts(r)]
+        if not new_rows:
+            self._reindex()
+            return
+        if self._sort_column >= 0 and len(new_rows) == 1:
+            self._reindex()
+            self._update_source_row(new_rows[0])
+            return
+        pos = bisect_left(self._rows, first) if self._sort_column < 0 else len(self._rows)
+        self.beginInsertRows(QModelIndex(), pos, pos + len(new_rows) - 1)
+        self._rows[pos:pos] = new_rows
+        self._reindex()
+        self.endInsertRows()
+        if self._sort_column >= 0: self._relayout()
+
+    def _on_source_rows_about_to_be_removed(self, parent, first, last):
+        source = self.sourceModel()
+        for row in range(first, last + 1): self._index.discard(source.filter_fields(row)[0])
+        proxy_rows = sorted(p for p in self._proxy_of[first:last + 1] if p >= 0)
+        if proxy_rows and proxy_rows[-1] - proxy_rows[0] + 1 == len(proxy_rows):
+            # Satu rentang kontigu -> remove biasa, seleksi lain tetap terjaga
+            self.beginRemoveRows(QModelIndex(), proxy_rows[0], proxy_rows[-1])
+            del self._rows[proxy_rows[0]:proxy_rows[-1] + 1]
+            self.endRemoveRows()
+        elif proxy_rows:
+            self._pending_reset = True
+            self.beginResetModel()
+
+    def _on_source_rows_removed(self, parent, first, last):
+        count = last - first + 1
+        del self._proxy_of[first:last + 1]
+        if self._pending_reset:
+            self._pending_reset = False
+            self._rebuild()
+            self.endResetModel()
+        else:
+            self._rows = [r - count if r > last else r for r in self._rows]
+            self._reindex()
+        self.status_counts_changed.emit(self._index.counts())
+
+    # --- QAbstractProxyModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None: return super().parent() # QObject.parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()): return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        source = self.sourceModel()
+        return source.columnCount(QModelIndex()) if source is not None and not parent.isValid() else 0
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows): return QModelIndex()
+        return self.sourceModel().index(self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid() or source_index.row() >= len(self._proxy_of): return QModelIndex()
+        proxy_row = self._proxy_of[source_index.row()]
+        return self.index(proxy_row, source_index.column()) if proxy_row >= 0 else QModelIndex()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows): return None
+        source = self.sourceModel()
+        return source.data(source.index(self._rows[index.row()], index.column()), role)
+
+    def flags(self, index):
+        if not index.isValid(): return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
 
 # --- Progress Bar Delegate (Tetap sama) ---
 class ProgressBarDelegate(QStyledItemDelegate):
+    """Progress bar digambar langsung dengan QPainter.
+
+    QStyleOptionProgressBar + style().drawControl per sel per repaint termasuk operasi
+    termahal di UI; di sini brush gradient dan metrik teks dibuat sekali lalu di-cache,
+    dan bar utuh (maks. 101 nilai per ukuran sel) di-cache sebagai pixmap.
+    Split download dapat ditampilkan per segmen (satu bar per part).
+    """
+    BORDER_COLOR = QColor("#454545")
+    TEXT_COLOR = QColor("#FFFFFF")
+    RADIUS = 4
+    MAX_CACHED_BARS = 1024
+
+    def __init__(self, parent=None, show_segments=True):
+        super().__init__(parent)
+        self.show_segments = show_segments
+        # ObjectBoundingMode: gradient relatif terhadap bentuk yang digambar -> satu brush untuk semua lebar
+        gradient = QLinearGradient(0, 0, 1, 0)
+        gradient.setCoordinateMode(QGradient.ObjectBoundingMode)
+        gradient.setColorAt(0, QColor("#8E44AD"))
+        gradient.setColorAt(1, QColor("#9B59B6"))
+        self.chunk_brush = QBrush(gradient)
+        self.border_pen = QPen(self.BORDER_COLOR)
+        self.segment_pen = QPen(self.BORDER_COLOR)
+        self._text_metrics = {} # {font key: (ascent, descent, {progress: (teks, lebar)}, QFontMetricsF)}
+        self._bar_cache = {} # {(w, h, dpr, font key, progress): QPixmap}
+
+    def _text(self, font, progress):
+        key = font.key()
+        metrics = self._text_metrics.get(key)
+        if metrics is None:
+            fm = QFontMetricsF(font)
+            metrics = self._text_metrics[key] = (fm.ascent(), fm.descent(), {}, fm)
+        ascent, descent, texts, fm = metrics
+        entry = texts.get(progress)
+        if entry is None:
+            text = f"{progress}%"
+            entry = texts[progress] = (text, fm.horizontalAdvance(text))
+        return entry[0], entry[1], ascent, descent
+
     def paint(self, painter, option, index):
-        if index.column() == 2:
-            progress = index.data()
-            progress_bar_option = QStyleOptionProgressBar()
-            progress_bar_option.rect = option.rect
-            progress_bar_option.minimum = 0
-            progress_bar_option.maximum = 100
-            progress_bar_option.progress = progress
-            progress_bar_option.text = f"{progress}%"
-            progress_bar_option.textVisible = True
-            progress_bar_option.textAlignment = Qt.AlignCenter
-            QApplication.style().drawControl(QStyle.CE_ProgressBar, progress_bar_option, painter)
-        else:
+        if index.column() != 2:
             super().paint(painter, option, index)
+            return
+        progress = min(index.data() or 0, 100)
+        if option.state & QStyle.State_Selected: painter.fillRect(option.rect, option.palette.highlight())
+        segments = index.data(SEGMENTS_ROLE) if self.show_segments else None
+        if segments and len(segments) > 1:
+            painter.save()
+            self._draw_bar(painter, QRectF(option.rect), option.font, progress, segments)
+            painter.restore()
+            return
+        rect, dpr = option.rect, painter.device().devicePixelRatioF()
+        key = (rect.width(), rect.height(), dpr, option.font.key(), progress)
+        pixmap = self._bar_cache.get(key)
+        if pixmap is None:
+            if len(self._bar_cache) >= self.MAX_CACHED_BARS: self._bar_cache.clear() # Kolom di-resize
+            pixmap = QPixmap(round(rect.width() * dpr), round(rect.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            bar_painter = QPainter(pixmap)
+            self._draw_bar(bar_painter, QRectF(0, 0, rect.width(), rect.height()), option.font, progress, None)
+            bar_painter.end()
+            self._bar_cache[key] = pixmap
+        painter.drawPixmap(rect.topLeft(), pixmap)
+
+    def _draw_bar(self, painter, cell, font, progress, segments):
+        rect = cell.adjusted(2, 3, -2, -3)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.border_pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRoundedRect(rect, self.RADIUS, self.RADIUS)
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.chunk_brush)
+        if segments:
+            segment_width = rect.width() / len(segments)
+            for i, fraction in enumerate(segments):
+                if fraction > 0:
+                    painter.drawRect(QRectF(rect.x() + i * segment_width, rect.y(),
+                                            segment_width * min(fraction, 1.0), rect.height()))
+            painter.setPen(self.segment_pen)
+            for i in range(1, len(segments)):
+                x = rect.x() + i * segment_width
+                painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+        elif progress > 0:
+            painter.drawRoundedRect(QRectF(rect.x(), rect.y(), rect.width() * progress / 100, rect.height()),
+                                    self.RADIUS, self.RADIUS)
+
+        text, text_width, ascent, descent = self._text(font, progress)
+        painter.setFont(font)
+        painter.setPen(self.TEXT_COLOR)
+        painter.drawText(QPointF(rect.center().x() - text_width / 2, rect.center().y() + (ascent - descent) / 2), text)
+
+def draw_throughput(painter, rect, values, line_pen, fill_brush):
+    """Gambar riwayat throughput sebagai area + garis, diskalakan ke puncak jendela yang tampil."""
+    peak = max(values, default=0)
+    if len(values) < 2 or peak <= 0: return
+    step = rect.width() / (len(values) - 1)
+    bottom = rect.bottom()
+    points = [QPointF(rect.left() + i * step, bottom - rect.height() * min(v / peak, 1.0)) for i, v in enumerate(values)]
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(fill_brush)
+    painter.drawPolygon(QPolygonF([QPointF(points[0].x(), bottom)] + points + [QPointF(points[-1].x(), bottom)]))
+    painter.setPen(line_pen)
+    painter.drawPolyline(QPolygonF(points))
+
+class SparklineDelegate(QStyledItemDelegate):
+    """Sparkline throughput per item di kolom Activity."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.line_pen = QPen(QColor("#9B59B6"), 1.2)
+        self.fill_brush = QBrush(QColor(155, 89, 182, 70))
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected: painter.fillRect(option.rect, option.palette.highlight())
+        history = index.data(THROUGHPUT_ROLE)
+        if history is None: return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        draw_throughput(painter, QRectF(option.rect).adjusted(3, 4, -3, -4), history.values(), self.line_pen, self.fill_brush)
+        painter.restore()
+
+class ThroughputGraph(QWidget):
+    """Grafik throughput lebih besar (dialog progress & status bar) dengan label kecepatan terkini/puncak."""
+    def __init__(self, parent=None, history=None, show_label=True):
+        super().__init__(parent)
+        self.history = history
+        self.show_label = show_label
+        self.line_pen = QPen(QColor("#9B59B6"), 1.5)
+        self.fill_brush = QBrush(QColor(155, 89, 182, 90))
+        self.setMinimumHeight(60 if show_label else 16)
+
+    def set_history(self, history):
+        self.history = history
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        painter.setPen(QPen(QColor("#454545")))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(rect)
+        if self.history is None: return
+        values = self.history.values()
+        draw_throughput(painter, rect.adjusted(1, 1, -1, -1), values, self.line_pen, self.fill_brush)
+        if self.show_label:
+            painter.setPen(QColor("#FFFFFF"))
+            painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignTop | Qt.AlignLeft,
+                             f"{format_speed(self.history.latest())}  (peak {format_speed(max(values, default=0))})")
+
+MAX_REMOVE_RANGES = 64 # Lebih dari ini -> satu kompaksi + reset model, bukan sinyal per range
+
+def contiguous_ranges(rows):
+    """[1, 2, 3, 7, 8] -> [(1, 3), (7, 8)]; `rows` harus sudah terurut."""
+    ranges = []
+    for row in rows:
+        if ranges and row == ranges[-1][1] + 1: ranges[-1][1] = row
+        else: ranges.append([row, row])
+    return [tuple(r) for r in ranges]
+
+def delete_download_files(entries):
+    """Hapus file hasil dan part file-nya; dijalankan di thread latar."""
+    for filepath, splits in entries:
+        for path in [filepath] + [f"{filepath}.part{i}" for i in range(splits)]:
+            if os.path.exists(path):
+                try: os.remove(path)
+                except OSError as e: print(f"Failed to delete file {path}: {e}")
+
+class ManagerCommandQueue(QObject):
+    """Antrian perintah thread-safe ke thread pemilik DownloadManager.
+
+    Thread latar tidak boleh menyentuh active_downloads/download_queue; mereka
+    memanggil `post(fn, *args)` dan `fn` dijalankan berurutan di thread milik
+    manager. Banyak post beruntun hanya memicu satu wake-up (di-drain sekaligus).
+    """
+    _wake = Signal()
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.commands = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.wake_pending = False
+        self._wake.connect(self.drain, Qt.QueuedConnection)
+
+    def post(self, fn, *args):
+        self.commands.put((fn, args))
+        with self.lock:
+            if self.wake_pending: return
+            self.wake_pending = True
+        self._wake.emit()
+
+    @Slot()
+    def drain(self):
+        with self.lock: self.wake_pending = False
+        while True:
+            try: fn, args = self.commands.get_nowait()
+            except queue.Empty: return
+            try: fn(*args)
+            except Exception as e: print(f"Manager command {fn.__name__} failed: {e}")
+
+# --- Jadwal bandwidth per jam (profil berganti otomatis) ---
+SCHEDULE_CHECK_MS = 30000 # Aturan beresolusi menit; cek 2x per menit cukup
+SCHEDULE_DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SCHEDULE_TIME = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+def parse_non_negative(text):
+    value = int(text)
+    if value < 0: raise ValueError(f"negative value {value}")
+    return value
+
+def parse_schedule_days(text):
+    """"mon-fri" / "sat,sun" / "mon-wed,fri" -> frozenset indeks weekday()."""
+    days = set()
+    for part in text.lower().split(","):
+        first, _, last = part.partition("-")
+        if first not in SCHEDULE_DAYS or (last and last not in SCHEDULE_DAYS): raise ValueError(f"unknown day '{part}'")
+        start, end = SCHEDULE_DAYS.index(first), SCHEDULE_DAYS.index(last or first)
+        days.update(range(start, end + 1) if start <= end else [*range(start, 7), *range(0, end + 1)])
+    return frozenset(days)
+
+class ScheduleRule:
+    """Satu baris jadwal: `HH:MM-HH:MM [days=mon-fri] [speed=KB/s] [max=N] [paused] [off-peak]`.
+
+    Rentang boleh melewati tengah malam (22:00-07:00); `paused` = tidak ada
+    transfer, `off-peak` = item bertanda off-peak boleh jalan. Opsi yang tidak
+    disebut memakai pengaturan global.
+    """
+    __slots__ = ('text', 'start', 'end', 'days', 'speed_limit_kbps', 'max_concurrent', 'off_peak')
+
+    def __init__(self, line):
+        self.text = line.strip()
+        tokens = self.text.split()
+        match = SCHEDULE_TIME.match(tokens[0]) if tokens else None
+        if not match: raise ValueError("expected HH:MM-HH:MM")
+        h1, m1, h2, m2 = (int(g) for g in match.groups())
+        self.start, self.end = h1 * 60 + m1, h2 * 60 + m2
+        # 24:00 hanya boleh sebagai akhir rentang
+        if h1 > 23 or m1 > 59 or m2 > 59 or self.end > 24 * 60: raise ValueError(f"invalid time '{tokens[0]}'")
+        if self.start == self.end: raise ValueError(f"empty time range '{tokens[0]}'")
+        self.days = frozenset(range(7))
+        self.speed_limit_kbps = self.max_concurrent = None
+        self.off_peak = False
+        for token in tokens[1:]:
+            key, _, value = token.lower().partition("=")
+            try:
+                if key == "days": self.days = parse_schedule_days(value)
+                elif key == "speed": self.speed_limit_kbps = 0 if value == "unlimited" else parse_non_negative(value)
+                elif key == "max": self.max_concurrent = parse_non_negative(value)
+                elif key == "paused" and not value: self.max_concurrent = 0
+                elif key == "off-peak" and not value: self.off_peak = True
+                else: raise ValueError(f"unknown option '{token}'")
+            except ValueError as e:
+                if key in ("speed", "max"): raise ValueError(f"invalid number in '{token}'") from e
+                raise
+
+    def matches(self, now):
+        minute, day = now.hour * 60 + now.minute, now.weekday()
+        if self.start <= self.end: return self.start <= minute < self.end and day in self.days
+        # Melewati tengah malam: bagian setelah 00:00 milik hari sebelumnya
+        if minute >= self.start: return day in self.days
+        return minute < self.end and (day - 1) % 7 in self.days
+
+class BandwidthSchedule:
+    """Daftar ScheduleRule dari teks pengaturan; aturan pertama yang cocok yang berlaku."""
+    def __init__(self, text=""):
+        self.rules, self.errors = [], []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.split("#", 1)[0].strip()
+            if not line: continue
+            try: self.rules.append(ScheduleRule(line))
+            except ValueError as e: self.errors.append(f"Line {number}: {e}")
+
+    def profile_at(self, now):
+        for rule in self.rules:
+            if rule.matches(now): return rule
+        return None
+
+# --- Kebijakan antrian (dipakai start_next_in_queue, bisa diganti saat berjalan) ---
+class QueuePolicy:
+    """Memilih item berikutnya dari kandidat antrian.
+
+    `select(candidates)` menerima DownloadItem yang boleh dimulai dalam urutan
+    antrian dan mengembalikan indeksnya. Seri diputus oleh urutan antrian (FIFO).
+    """
+    label = "FIFO"
+    scans_queue = True # False: cukup kandidat pertama, antrian tidak perlu dipindai
+    uses_sizes = False # True: manager mem-probe ukuran item antrian yang belum diketahui
+
+    def select(self, candidates): return 0
+
+class FifoQueuePolicy(QueuePolicy):
+    scans_queue = False
+
+class ShortestRemainingPolicy(QueuePolicy):
+    """Sisa byte terkecil dulu; ukuran belum diketahui dianggap paling besar."""
+    label = "Shortest Remaining First"
+    uses_sizes = True
+
+    def select(self, candidates):
+        return min(range(len(candidates)), key=lambda i: candidates[i].total_size - candidates[i].downloaded_size
+                   if candidates[i].total_size > 0 else math.inf)
+
+class EarliestDeadlinePolicy(QueuePolicy):
+    """Deadline terdekat dulu; item tanpa deadline menyusul dalam urutan antrian."""
+    label = "Earliest Deadline First"
+
+    def select(self, candidates):
+        return min(range(len(candidates)), key=lambda i: candidates[i].deadline if candidates[i].deadline is not None else math.inf)
+
+class CategoryRoundRobinPolicy(QueuePolicy):
+    """Bergiliran antar kategori (urut nama); dalam satu kategori tetap FIFO."""
+    label = "Round Robin by Category"
+
+    def __init__(self): self.last_category = None
+
+    def select(self, candidates):
+        first_of = {}
+        for i, item in enumerate(candidates): first_of.setdefault(item.category, i)
+        categories = sorted(first_of)
+        following = [c for c in categories if self.last_category is not None and c > self.last_category]
+        self.last_category = following[0] if following else categories[0]
+        return first_of[self.last_category]
+
+QUEUE_POLICIES = {"fifo": FifoQueuePolicy, "srf": ShortestRemainingPolicy, "edf": EarliestDeadlinePolicy,
+                  "category": CategoryRoundRobinPolicy}
+DEFAULT_QUEUE_POLICY = "fifo"
+SIZE_PROBE_TIMEOUT = 10
+
+class EngineSettings:
+    """Snapshot QSettings untuk hot path engine; dibuat ulang hanya saat pengaturan disimpan."""
+    __slots__ = ('max_concurrent_downloads', 'speed_limit_kbps', 'speed_window_seconds', 'schedule', 'queue_policy')
+
+    def __init__(self, settings):
+        self.max_concurrent_downloads = settings.value("max_concurrent_downloads", 3, type=int)
+        self.speed_limit_kbps = settings.value("speed_limit_kbps", 0, type=int)
+        self.speed_window_seconds = settings.value("speed_window_seconds", DEFAULT_SPEED_WINDOW_SECONDS, type=int)
+        self.schedule = BandwidthSchedule(settings.value("bandwidth_schedule", ""))
+        for error in self.schedule.errors: print(f"Bandwidth schedule: {error}")
+        self.queue_policy = settings.value("queue_policy", DEFAULT_QUEUE_POLICY)
+        if self.queue_policy not in QUEUE_POLICIES: self.queue_policy = DEFAULT_QUEUE_POLICY
 
 # --- Download Manager (LOGIKA UTAMA DIRUBAH BESAR) ---
 class DownloadManager(QObject):
     model_updated = Signal()
     download_finished_notification = Signal(str)
     item_updated = Signal(object)
+    row_updated = Signal(str) # uid (item live atau baris archive)
     # --- FIX CRASH: Signals for safe row removal ---
     rows_about_to_be_removed = Signal(QModelIndex, int, int)
     rows_removed = Signal(QModelIndex, int, int)
+    rows_about_to_be_inserted = Signal(QModelIndex, int, int)
+    rows_inserted = Signal()
+    model_about_to_be_reset = Signal()
+    model_reset = Signal()
+    history_loaded = Signal(int) # jumlah item
+    manifest_verification_finished = Signal(int, int, int) # ok, mismatched (re-queued), unmatched
+    throughput_sampled = Signal() # Riwayat throughput (per item & total) baru saja bertambah
+    downloads_added = Signal(int) # Jumlah item dari satu add_downloads()
+    schedule_profile_changed = Signal(str) # Teks aturan jadwal yang berlaku ("" = pengaturan global)
     MAX_RETRIES = 3
 
     def __init__(self, settings):
         super().__init__()
         self.settings = settings
-        self.downloads = []
+        self.config = EngineSettings(settings) # Dibaca di hot path; diperbarui oleh apply_settings()
+        self.profile = self.config.schedule.profile_at(datetime.now()) # ScheduleRule aktif atau None
+        self.queue_policy = QUEUE_POLICIES[self.config.queue_policy]()
+        self.size_probes = set() # uid antrian yang ukurannya sedang di-probe (kebijakan uses_sizes)
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.timeout.connect(self.check_schedule)
+        self.schedule_timer.start(SCHEDULE_CHECK_MS)
+        self.downloads = [] # Item live (DownloadItem)
+        self._live_rows = None # {uid: row} untuk self.downloads, dibangun ulang setelah penghapusan
+        self.archive = DownloadArchive() # Riwayat FINISHED yang belum disentuh sesi ini
         self.download_queue = []
+        # State scheduler (download_queue, active_downloads, finalizing) hanya diubah di thread manager;
+        # konteks lain mengirim perintah lewat self.commands.post(...)
+        self.commands = ManagerCommandQueue(self)
         self.active_downloads = {} # {uid: {'item': DownloadItem, 'workers': {part_uid: worker}, ...}}
-        self.last_updates = {}
-        self.merge_lock = threading.Lock()
-        self.load_downloads()
+        self.rate_estimators = {} # {uid: TransferRateEstimator}, hanya untuk item yang sedang transfer
+        self.total_throughput = ThroughputHistory() # Agregat seluruh aplikasi
+        self.sampled_items = {} # {uid: DownloadItem} yang punya ThroughputHistory
+        self.throughput_timer = QTimer(self)
+        self.throughput_timer.timeout.connect(self.sample_throughput)
+        self.throughput_timer.start(THROUGHPUT_SAMPLE_MS)
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(self.sample_progress)
+        self.progress_timer.start(PROGRESS_SAMPLE_MS)
+        self.finalizing = {} # {uid: DownloadItem} yang sedang di-merge/verifikasi di DownloadFinalizer
+        self.finalizer = DownloadFinalizer(self.settings.value("max_concurrent_finalizations", DEFAULT_MAX_FINALIZATIONS, type=int))
+        self.finalizer.progress.connect(self.on_finalize_progress)
+        self.finalizer.finished.connect(self.on_finalize_finished)
+        self.manifest_thread = None
+        self.manifest_jobs = {} # {uid: [(algo, expected_digest)]}, satu entri per baris manifest
+        self.manifest_results = [0, 0, 0]
+        self.store = None
+        self.checkpointer = None
+        self.dirty_uids = {} # {uid: None}; dict, bukan set: urutan tulis = urutan tambah -> rowid (urutan antrian) tetap
+        self.deleted_uids = set()
+        self.history_thread = None
+        self.batch_threads = {} # {id(thread): (QThread, DownloadBatchBuilder)}
+        self.worker_threads = {} # {id(thread): (QThread, DownloadWorker)}; tetap hidup sampai thread selesai
+        # Checkpoint berkala (maks. 1x per detik): hanya item yang berubah
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.save_downloads)
+        self.flush_timer.start(CHECKPOINT_INTERVAL_MS)
 
     def connect_model(self, model):
         """Connects signals to the model for safe updates."""
         self.rows_about_to_be_removed.connect(model.beginRemoveRows)
         self.rows_removed.connect(model.endRemoveRows)
+        self.rows_about_to_be_inserted.connect(model.beginInsertRows)
+        self.rows_inserted.connect(model.endInsertRows)
+        self.model_about_to_be_reset.connect(model.beginResetModel)
+        self.model_reset.connect(model.endResetModel)
 
+    # Profil jadwal yang aktif menimpa pengaturan global per opsi
+    @property
+    def max_concurrent_downloads(self):
+        if self.profile is not None and self.profile.max_concurrent is not None: return self.profile.max_concurrent
+        return self.config.max_concurrent_downloads
     @property
-    def max_concurrent_downloads(self): return self.settings.value("max_concurrent_downloads", 3, type=int)
+    def speed_limit_kbps(self):
+        if self.profile is not None and self.profile.speed_limit_kbps is not None: return self.profile.speed_limit_kbps
+        return self.config.speed_limit_kbps
     @property
-    def speed_limit_kbps(self): return self.settings.value("speed_limit_kbps", 0, type=int)
+    def speed_window_seconds(self): return self.config.speed_window_seconds
+    @property
+    def off_peak_window(self): return self.profile is not None and self.profile.off_peak
+
+    @Slot()
+    def apply_settings(self):
+        """Baca ulang QSettings ke snapshot dan terapkan ke transfer yang sedang berjalan."""
+        old_window, old_policy = self.speed_window_seconds, self.config.queue_policy
+        self.config = EngineSettings(self.settings)
+        if self.config.queue_policy != old_policy:
+            self.queue_policy = QUEUE_POLICIES[self.config.queue_policy]()
+            self.probe_queued_sizes()
+        self.profile = self.config.schedule.profile_at(datetime.now())
+        self.schedule_profile_changed.emit(self.profile.text if self.profile else "")
+        self._apply_engine_state(old_window)
+
+    @Slot()
+    def check_schedule(self):
+        profile = self.config.schedule.profile_at(datetime.now())
+        if profile is self.profile: return
+        self.profile = profile
+        self.schedule_profile_changed.emit(profile.text if profile else "")
+        self._apply_engine_state(self.speed_window_seconds)
+
+    def _apply_engine_state(self, old_window):
+        if self.speed_window_seconds != old_window:
+            for estimator in self.rate_estimators.values(): estimator.set_window(self.speed_window_seconds)
+        self._requeue_unscheduled()
+        self.start_next_in_queue() # Batas concurrency naik -> item antrian langsung jalan
+        self.allocate_bandwidth() # Batas kecepatan baru langsung berlaku di token bucket item
+
+    def allocate_bandwidth(self, now=None):
+        """Bagi batas kecepatan efektif (global/jadwal) antar item yang sedang transfer, sebanding bobot
+        prioritasnya dan tidak bergantung jumlah koneksi. Item yang tidak memakai habis jatahnya (server
+        lambat) dibatasi di laju aktualnya; sisanya diberikan ke item lain.
+
+        `now` hanya diberikan oleh sample_progress: demand diukur ulang dari counter yang baru dibaca;
+        panggilan lain (pengaturan, prioritas, item mulai) memakai demand terakhir.
+        """
+        tasks = [task for task in self.active_downloads.values()
+                 if 'counters' in task and task['item'].status != DownloadStatus.PAUSED]
+        if now is not None:
+            for task in tasks:
+                downloaded, mark = task['item'].downloaded_size, task.get('rate_mark')
+                task['rate_mark'] = (now, downloaded)
+                if task['bucket'].take_throttled() or mark is None or now <= mark[0]: task['demand'] = None # Tertahan bucket -> mau lebih
+                else: task['demand'] = (downloaded - mark[1]) / (now - mark[0]) * SHARE_DEMAND_HEADROOM
+        capacity = self.speed_limit_kbps * 1024
+        if capacity <= 0:
+            for task in tasks: task['bucket'].set_rate(0)
+            return
+        shares = weighted_fair_shares(capacity, [task['item'].priority for task in tasks], [task.get('demand') for task in tasks])
+        for task, share in zip(tasks, shares): task['bucket'].set_rate(max(share, MIN_BUCKET_RATE))
+
+    def _requeue_unscheduled(self):
+        """Transfer yang tidak diizinkan profil sekarang (paused, item off-peak di luar jendelanya, atau
+        kelebihan dari max yang diturunkan) melepas koneksinya dan kembali ke depan antrian; nanti
+        dilanjutkan lewat Range. Item yang di-pause user tetap memegang slotnya."""
+        paused, off_peak = self.max_concurrent_downloads == 0, self.off_peak_window
+        running = [uid for uid, task in self.active_downloads.items() if task['item'].status != DownloadStatus.PAUSED]
+        requeued = [uid for uid in running if paused or (self.active_downloads[uid]['item'].off_peak and not off_peak)]
+        excess = len(self.active_downloads) - len(requeued) - self.max_concurrent_downloads
+        if excess > 0: # Yang terakhir dimulai dikembalikan dulu
+            kept = [uid for uid in running if uid not in requeued]
+            requeued += kept[-excess:]
+            requeued.sort(key=running.index) # Urutan antrian tetap urutan mulai
+        for uid in requeued:
+            task = self.active_downloads.pop(uid)
+            for part_info in task['workers'].values():
+                if part_info.get('finished'): continue
+                try: part_info['worker'].stop()
+                except RuntimeError: pass
+            self._sample_task(task, final=True)
+            self.on_worker_status_changed(uid, DownloadStatus.QUEUED)
+        self.download_queue[0:0] = requeued
+
+    def set_off_peak(self, uids, enabled):
+        """Tandai item agar hanya berjalan di jendela off-peak jadwal."""
+        for uid in uids:
+            item = self.get_item_by_uid(uid)
+            if item is None or item.off_peak == enabled: continue
+            item.off_peak = enabled
+            self.mark_dirty(item)
+            self.item_updated.emit(item)
+        self._requeue_unscheduled()
+        self.start_next_in_queue()
+
+    def set_queue_policy(self, key):
+        """Ganti kebijakan antrian saat berjalan; berlaku untuk slot berikutnya yang kosong."""
+        self.settings.setValue("queue_policy", key)
+        self.apply_settings()
+
+    def set_deadline(self, uids, deadline):
+        for uid in uids:
+            item = self.get_item_by_uid(uid)
+            if item is None or item.deadline == deadline: continue
+            item.deadline = deadline
+            self.mark_dirty(item)
+            self.item_updated.emit(item)
+
+    def probe_queued_sizes(self):
+        """Kebijakan berbasis ukuran: HEAD di thread latar untuk item antrian yang ukurannya belum diketahui."""
+        if not self.queue_policy.uses_sizes: return
+        jobs = []
+        for uid in self.download_queue:
+            item = self.get_item_by_uid(uid)
+            if item is not None and item.total_size <= 0 and uid not in self.size_probes:
+                self.size_probes.add(uid)
+                jobs.append((uid, item.url))
+        if jobs: threading.Thread(target=self._probe_sizes, args=(jobs,), name="SizeProbe", daemon=True).start()
+
+    def _probe_sizes(self, jobs):
+        """Thread latar: hanya HEAD request; hasilnya kembali lewat self.commands."""
+        with requests.Session() as session:
+            for uid, url in jobs:
+                size = 0
+                try:
+                    with session.head(url, timeout=SIZE_PROBE_TIMEOUT, allow_redirects=True) as r:
+                        if r.ok: size = int(r.headers.get('content-length', 0))
+                except (requests.exceptions.RequestException, ValueError): pass
+                self.commands.post(self._on_size_probed, uid, size)
+
+    def _on_size_probed(self, uid, size):
+        self.size_probes.discard(uid)
+        item = self.get_item_by_uid(uid)
+        if item is None or size <= 0 or item.total_size > 0 or item.status != DownloadStatus.QUEUED: return
+        item.total_size = size
+        self.mark_dirty(item)
+        self.item_updated.emit(item)
+
+    def set_priority(self, uids, weight):
+        for uid in uids:
+            item = self.get_item_by_uid(uid)
+            if item is None or item.priority == weight: continue
+            item.priority = weight
+            self.mark_dirty(item)
+            self.item_updated.emit(item)
+        self.allocate_bandwidth()
 
     def load_downloads(self):
-        # ... (logika load tetap sama)
-        save_path = self.settings.value("download_list_path", "")
-        if save_path and os.path.exists(save_path):
-            try:
-                with open(save_path, 'r') as f:
-                    data = json.load(f)
-                    for item_data in data:
-                        item = DownloadItem.from_dict(item_data)
-                        self.downloads.append(item)
-                        if item.status not in [DownloadStatus.FINISHED, DownloadStatus.STOPPED, DownloadStatus.ERROR]:
-                            self.download_queue.append(item.uid)
-                self.model_updated.emit()
-            except (json.JSONDecodeError, KeyError) as e: print(f"Could not load download list: {e}")
+        """Mulai load riwayat di background; item masuk ke model per batch."""
+        db_path = self.settings.value("download_db_path", "")
+        if not db_path or self.history_thread is not None: return
+        thread = QThread()
+        loader = HistoryLoader(db_path, db_path + ".journal", self.settings.value("download_list_path", ""))
+        loader.moveToThread(thread)
+        thread.started.connect(loader.run)
+        loader.batch_loaded.connect(self.on_history_batch_loaded)
+        loader.archive_loaded.connect(self.on_history_archive_loaded)
+        loader.finished.connect(self.on_history_loaded)
+        loader.finished.connect(thread.quit)
+        loader.finished.connect(loader.deleteLater)
+        thread.finished.connect(self.on_history_thread_finished)
+        thread.finished.connect(thread.deleteLater)
+        self.history_thread = (thread, loader)
+        thread.start()
 
+    def _append_items(self, items):
+        """Satu beginInsertRows/endInsertRows untuk seluruh batch."""
+        if not items: return
+        first = len(self.downloads)
+        self.rows_about_to_be_inserted.emit(QModelIndex(), first, first + len(items) - 1)
+        self.downloads.extend(items)
+        if self._live_rows is not None: self._live_rows.update((item.uid, first + i) for i, item in enumerate(items))
+        self.rows_inserted.emit()
 
-    def save_downloads(self):
-        # ... (logika save tetap sama)
-        save_path = self.settings.value("download_list_path", "")
-        if save_path:
-            try:
-                with open(save_path, 'w') as f: json.dump([item.to_dict() for item in self.downloads], f, indent=4)
-            except IOError as e: print(f"Could not save download list: {e}")
+    @Slot(object)
+    def on_history_archive_loaded(self, chunk):
+        first = len(self.downloads) + len(self.archive)
+        self.rows_about_to_be_inserted.emit(QModelIndex(), first, first + len(chunk) - 1)
+        self.archive.extend(chunk)
+        self.rows_inserted.emit()
+
+    def row_count(self): return len(self.downloads) + len(self.archive)
+
+    def item_at(self, row):
+        """Item untuk baris model; baris archive dikembalikan sebagai salinan (read-only)."""
+        if row < len(self.downloads): return self.downloads[row]
+        return self.archive.materialize(row - len(self.downloads))
+
+    def promote_archived(self, uid):
+        """Pindahkan baris archive menjadi DownloadItem live (di akhir daftar live)."""
+        row = self.archive.row_of(uid)
+        if row is None: return self.get_item_by_uid(uid)
+        item = self.archive.materialize(row)
+        model_row = len(self.downloads) + row
+        self.rows_about_to_be_removed.emit(QModelIndex(), model_row, model_row)
+        self.archive.pop(row)
+        self.rows_removed.emit(QModelIndex(), model_row, model_row)
+        self._append_items([item])
+        return item
+
+    @Slot(object)
+    def on_history_batch_loaded(self, items):
+        self._append_items(items)
+        for item in items:
+            if item.status not in [DownloadStatus.FINISHED, DownloadStatus.STOPPED, DownloadStatus.ERROR]:
+                self.download_queue.append(item.uid)
+        self.start_next_in_queue()
+
+    @Slot(object, object)
+    def on_history_loaded(self, store, replayed):
+        if store is None: return
+        self.store = store
+        self.checkpointer = DownloadCheckpointer(store, self.settings.value("download_db_path") + ".journal")
+        self.checkpointer.start(replayed)
+        self.history_loaded.emit(self.row_count())
+
+    @Slot()
+    def on_history_thread_finished(self): self.history_thread = None
+
+    @Slot()
+    def sample_throughput(self):
+        """Satu sampel per detik untuk item aktif + total; biaya hanya sebanding jumlah item aktif."""
+        interval = THROUGHPUT_SAMPLE_MS / 1000
+        total = 0
+        for uid, task in self.active_downloads.items():
+            item = task['item']
+            if item.throughput is None:
+                item.throughput = ThroughputHistory()
+                self.sampled_items[uid] = item
+            total += item.throughput.sample_bytes(item.downloaded_size, interval)
+            self.row_updated.emit(uid)
+        for uid in [uid for uid in self.sampled_items if uid not in self.active_downloads]:
+            self.sampled_items.pop(uid).throughput = None # Riwayat dilepas setelah item tidak aktif
+            self.row_updated.emit(uid)
+        self.total_throughput.push(total / interval)
+        self.throughput_sampled.emit()
+
+    def mark_dirty(self, item): self.dirty_uids[item.uid] = None
 
-    def add_download(self, url, filepath, category, splits):
-        item = DownloadItem(url, filepath, category, splits)
-        # This can be improved to use beginInsertRows, but for now, a full refresh is okay for additions.
-        self.downloads.append(item)
+    def save_downloads(self):
+        """Snapshot item yang berubah lalu serahkan ke checkpointer (tanpa I/O di GUI thread)."""
+        if self.checkpointer is None or not (self.dirty_uids or self.deleted_uids): return
+        upserts = []
+        for uid in self.dirty_uids:
+            item = self.get_item_by_uid(uid)
+            if item: upserts.append(item.to_dict())
+            elif self.archive.row_of(uid) is not None: upserts.append(self.archive.to_dict(self.archive.row_of(uid)))
+        self.checkpointer.submit(upserts, self.deleted_uids)
+        self.dirty_uids.clear()
+        self.deleted_uids.clear()
+
+    def close_store(self):
+        """Flush terakhir + kompaksi, dipanggil saat aplikasi keluar."""
+        self.flush_timer.stop()
+        if self.history_thread is not None: # Masih load riwayat
+            thread, loader = self.history_thread
+            loader.stop()
+            thread.quit()
+            thread.wait()
+            QApplication.processEvents() # Kirim sinyal finished yang tertunda -> store/checkpointer
+        for thread, builder in list(self.batch_threads.values()):
+            thread.quit()
+            thread.wait()
+        workers = list(self.worker_threads.values())
+        for thread, worker in workers: # Hentikan semua dulu; read yang blok langsung dibatalkan
+            worker.stop()
+            thread.quit()
+        deadline = QDeadlineTimer(WORKER_EXIT_TIMEOUT_MS) # Satu batas waktu bersama, bukan per thread
+        for thread, worker in workers: thread.wait(deadline)
+        self.finalizer.shutdown() # Merge yang dibatalkan menyisakan part utuh, dilanjutkan sesi berikutnya
+        self.save_downloads()
+        if self.checkpointer is not None:
+            self.checkpointer.close()
+            self.checkpointer = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def add_download(self, url, filepath, category, splits, checksum_algo=None, expected_checksum="", off_peak=False):
+        item = DownloadItem(url, filepath, category, splits, checksum_algo, expected_checksum)
+        item.off_peak = off_peak
+        self._append_items([item])
         self.download_queue.append(item.uid)
-        self.last_updates[item.uid] = (time.time(), 0)
+        self.mark_dirty(item)
         self.start_next_in_queue()
-        self.model_updated.emit()
+        self.probe_queued_sizes()
         return item
 
-    def get_item_by_uid(self, uid): return next((item for item in self.downloads if item.uid == uid), None)
+    def add_downloads(self, batch, directory=None, list_path=None):
+        """Tambah banyak download sekaligus.
+
+        Item dibangun di thread latar; hasilnya masuk model dengan satu
+        beginInsertRows/endInsertRows dan scheduler dijalankan sekali.
+        `list_path`: file teks berisi URL (dipakai sebagai pengganti `batch`).
+        """
+        taken_paths = {item.filepath for item in self.downloads}
+        taken_paths.update(self.archive.filepaths)
+        thread = QThread()
+        builder = DownloadBatchBuilder(list(batch), directory or default_download_path(self.settings),
+                                       taken_paths, list_path)
+        builder.moveToThread(thread)
+        thread.started.connect(builder.run)
+        builder.finished.connect(self.on_batch_built)
+        builder.finished.connect(thread.quit)
+        builder.finished.connect(builder.deleteLater)
+        key = id(thread)
+        thread.finished.connect(lambda: self.commands.post(self.batch_threads.pop, key, None))
+        thread.finished.connect(thread.deleteLater)
+        self.batch_threads[key] = (thread, builder)
+        thread.start()
+
+    @Slot(object)
+    def on_batch_built(self, items):
+        if items:
+            self._append_items(items)
+            self.download_queue.extend(item.uid for item in items)
+            self.dirty_uids.update(dict.fromkeys(item.uid for item in items))
+            self.start_next_in_queue()
+            self.probe_queued_sizes()
+        self.downloads_added.emit(len(items))
+
+    def _live_row(self, uid):
+        if self._live_rows is None: self._live_rows = {item.uid: i for i, item in enumerate(self.downloads)}
+        return self._live_rows.get(uid)
+
+    def get_item_by_uid(self, uid):
+        row = self._live_row(uid)
+        return self.downloads[row] if row is not None else None
+
+    def uid_at(self, row):
+        if row < len(self.downloads): return self.downloads[row].uid
+        return self.archive.uids[row - len(self.downloads)]
 
     def start_next_in_queue(self):
         while len(self.active_downloads) < self.max_concurrent_downloads and self.download_queue:
-            uid_to_start = self.download_queue.pop(0)
+            position = self._select_queued()
+            if position is None: break
+            uid_to_start = self.download_queue.pop(position)
             item = self.get_item_by_uid(uid_to_start)
             if item and item.status not in [DownloadStatus.DOWNLOADING, DownloadStatus.FINISHED]:
-                self.active_downloads[uid_to_start] = {'item': item, 'workers': {}}
+                self.active_downloads[uid_to_start] = {'item': item, 'workers': {}, 'bucket': TokenBucket()}
                 self.start_worker_for_item(item)
 
+    def _select_queued(self):
+        """Posisi di download_queue yang dimulai berikutnya menurut self.queue_policy, atau None.
+        Item off-peak di luar jendelanya dilewati tanpa mengubah posisinya; entri basi
+        (item sudah dihapus/berjalan/selesai) dikembalikan agar langsung dibuang."""
+        off_peak, candidates, positions = self.off_peak_window, [], []
+        for position, uid in enumerate(self.download_queue):
+            item = self.get_item_by_uid(uid)
+            if item is None or item.status in (DownloadStatus.DOWNLOADING, DownloadStatus.FINISHED): return position
+            if item.off_peak and not off_peak: continue
+            candidates.append(item)
+            positions.append(position)
+            if not self.queue_policy.scans_queue: break
+        return positions[self.queue_policy.select(candidates)] if candidates else None
+
     def start_worker_for_item(self, item):
         if item.splits > 1:
-            # Lakukan HEAD request di thread terpisah agar UI tidak freeze
-            info_thread = threading.Thread(target=self._get_info_and_start_split, args=(item,))
-            info_thread.daemon = True
-            info_thread.start()
+            # HEAD request di thread terpisah agar UI tidak freeze; hasilnya kembali lewat self.commands
+            task = self.active_downloads[item.uid]
+            task['probing'] = True
+            threading.Thread(target=self._probe_split_download, args=(task, item.url), name="SplitProbe", daemon=True).start()
         else:
             self._start_single_download(item)
 
-    def _get_info_and_start_split(self, item):
+    def _probe_split_download(self, task, url):
+        """Thread latar: hanya HEAD request, tidak menyentuh item maupun state manager."""
         try:
-            with requests.head(item.url, timeout=15, allow_redirects=True) as r:
+            with requests.head(url, timeout=15, allow_redirects=True) as r:
                 r.raise_for_status()
                 accept_ranges = r.headers.get('Accept-Ranges') == 'bytes'
                 total_size = int(r.headers.get('content-length', 0))
-
-                if not accept_ranges or total_size <= 0:
-                    print(f"Server doesn't support split download for {item.filename}. Falling back.")
-                    item.splits = 1
-                    self._start_single_download(item)
-                    return
-                
-                item.total_size = total_size
-                QApplication.instance().postEvent(self, lambda: self._start_split_download(item))
-
+                representation_digests, content_digests = parse_server_digests(r.headers)
+            self.commands.post(self._on_split_probed, task, accept_ranges, total_size,
+                               {**content_digests, **representation_digests}) # HEAD: body = file utuh
         except Exception as e:
-            print(f"Error getting file info for split download: {e}")
-            self.on_worker_error(item.uid, str(e))
+            self.commands.post(self._on_split_probe_failed, task, str(e))
+
+    def _probe_is_current(self, task):
+        """Item bisa di-stop/dihapus selama probe; hasil probe lama diabaikan."""
+        item = task['item']
+        if self.active_downloads.get(item.uid) is not task: return False
+        task.pop('probing', None)
+        return True
+
+    def _on_split_probed(self, task, accept_ranges, total_size, server_digests):
+        if not self._probe_is_current(task): return
+        item = task['item']
+        if not accept_ranges or total_size <= 0:
+            print(f"Server doesn't support split download for {item.filename}. Falling back.")
+            item.splits = 1
+            self._start_single_download(item)
+            return
+        item.total_size = total_size
+        item.server_digests = server_digests
+        self._start_split_download(item)
+
+    def _on_split_probe_failed(self, task, error_message):
+        if not self._probe_is_current(task): return
+        print(f"Error getting file info for split download: {error_message}")
+        self.on_worker_error(task['item'].uid, error_message)
     
     def _start_split_download(self, item):
         item.status = DownloadStatus.DOWNLOADING
         self.on_worker_status_changed(item.uid, DownloadStatus.DOWNLOADING)
         
         part_size = item.total_size // item.splits
+        hash_chain = None
+        algos = [item.checksum_algo] if item.checksum_algo else []
+        algos += [a for a in (item.server_digests or {}) if a not in algos]
+        if algos:
+            hash_chain = SegmentHashChain(algos, [f"{item.filepath}.part{i}" for i in range(item.splits)])
+        task = self.active_downloads[item.uid]
+        task['hash_chain'] = hash_chain
+        task['counters'] = counters = array('q', bytes(8 * item.splits)) # Satu slot per part, ditulis worker-nya
+        task['lengths'] = lengths = array('q')
+        self.allocate_bandwidth() # Rate bucket ditetapkan sebelum part pertama tersambung
         for i in range(item.splits):
             start = i * part_size
             end = start + part_size - 1
             if i == item.splits - 1:
                 end = item.total_size - 1
+            lengths.append(end - start + 1)
             
             part_uid = f"{item.uid}_part{i}"
             part_filepath = f"{item.filepath}.part{i}"
             
             thread = QThread()
-            worker = DownloadWorker(part_uid, item.url, part_filepath, self.speed_limit_kbps, (start, end))
+            worker = DownloadWorker(part_uid, item.url, part_filepath, task['bucket'], (start, end),
+                                    hash_chain=hash_chain, part_index=i, counters=counters, slot=i)
             
             worker.moveToThread(thread)
             thread.started.connect(worker.run)
@@ -463,47 +2769,62 @@ class DownloadManager(QObject):
             # Hubungkan sinyal dari worker part ke slot di manager
             worker.finished.connect(self.on_part_finished)
             worker.error.connect(self.on_part_error)
-            worker.progress.connect(self.on_part_progress)
-            worker.finished.connect(thread.quit)
-            worker.finished.connect(worker.deleteLater)
-            thread.finished.connect(thread.deleteLater)
+            self._track_worker_thread(thread, worker)
             
-            self.active_downloads[item.uid]['workers'][part_uid] = {
-                'worker': worker, 'thread': thread, 'progress': 0, 'finished': False
-            }
-            if os.path.exists(part_filepath):
-                self.active_downloads[item.uid]['workers'][part_uid]['progress'] = os.path.getsize(part_filepath)
+            task['workers'][part_uid] = {'worker': worker, 'thread': thread, 'finished': False}
+            if os.path.exists(part_filepath): counters[i] = os.path.getsize(part_filepath)
 
             thread.start()
 
     def _start_single_download(self, item):
         uid = item.uid
         thread = QThread()
-        worker = DownloadWorker(uid, item.url, item.filepath, self.speed_limit_kbps)
+        counters = self.active_downloads[uid]['counters'] = array('q', [item.downloaded_size])
+        self.allocate_bandwidth()
+        worker = DownloadWorker(uid, item.url, item.filepath, self.active_downloads[uid]['bucket'],
+                                checksum_algo=item.checksum_algo, expected_checksum=item.expected_checksum,
+                                counters=counters)
         item.thread, item.worker = thread, worker
         
         worker.moveToThread(thread)
         thread.started.connect(worker.run)
 
         worker.finished.connect(self.on_worker_finished)
-        worker.error.connect(self.on_worker_error)
-        worker.progress.connect(self.on_worker_progress)
+        worker.error.connect(self.on_worker_failed)
         worker.started.connect(self.on_worker_started)
-        worker.status_changed.connect(self.on_worker_status_changed)
-        
-        worker.finished.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        thread.finished.connect(thread.deleteLater)
+        worker.status_changed.connect(self.on_worker_status)
+        worker.checksum_computed.connect(self.on_worker_checksum)
+        self._track_worker_thread(thread, worker)
 
         self.active_downloads[uid]['workers'][uid] = {'worker': worker, 'thread': thread}
         thread.start()
 
+    def _track_worker_thread(self, thread, worker):
+        """Thread berakhir pada finished/error/stopped dan dipegang di sini sampai benar-benar selesai,
+        karena item bisa di-retry (thread baru) sebelum thread lama keluar. Worker sengaja tidak
+        di-deleteLater: ia harus tetap hidup sampai slot manager memeriksa sender()-nya; objeknya
+        dilepas saat referensi terakhir (task / worker_threads) hilang."""
+        for signal in (worker.finished, worker.error, worker.stopped):
+            signal.connect(thread.quit)
+        key = id(thread)
+        # QThread.finished dipancarkan dari thread worker -> bookkeeping lewat antrian perintah
+        thread.finished.connect(lambda key=key: self.commands.post(self.worker_threads.pop, key, None))
+        thread.finished.connect(thread.deleteLater)
+        self.worker_threads[key] = (thread, worker)
+
+    def _current_part(self, part_uid):
+        """Info part milik task aktif, atau None untuk sinyal dari worker run lama (item di-stop lalu di-retry)."""
+        task = self.active_downloads.get(part_uid.split('_part')[0])
+        part = task['workers'].get(part_uid) if task else None
+        return part if part is not None and part['worker'] is self.sender() else None
+
     @Slot(str)
     def on_part_finished(self, part_uid):
         main_uid = part_uid.split('_part')[0]
-        if main_uid not in self.active_downloads: return
+        part = self._current_part(part_uid)
+        if part is None: return
 
-        self.active_downloads[main_uid]['workers'][part_uid]['finished'] = True
+        part['finished'] = True
         
         # Cek apakah semua part sudah selesai
         all_finished = all(p['finished'] for p in self.active_downloads[main_uid]['workers'].values())
@@ -511,98 +2832,155 @@ class DownloadManager(QObject):
         if all_finished:
             item = self.get_item_by_uid(main_uid)
             if item:
-                self.merge_files(item)
-
-    @Slot(str, int)
-    def on_part_progress(self, part_uid, downloaded_in_part):
-        main_uid = part_uid.split('_part')[0]
-        if main_uid not in self.active_downloads: return
+                self.finalize_split_download(item)
 
-        self.active_downloads[main_uid]['workers'][part_uid]['progress'] = downloaded_in_part
-        
-        total_downloaded = sum(p['progress'] for p in self.active_downloads[main_uid]['workers'].values())
-        self.on_worker_progress(main_uid, total_downloaded)
-    
     @Slot(str, str)
     def on_part_error(self, part_uid, error_msg):
         main_uid = part_uid.split('_part')[0]
+        if self._current_part(part_uid) is None: return
         print(f"Error in part {part_uid}: {error_msg}. Stopping main download {main_uid}")
         # Jika satu part gagal, hentikan semua part lain dan tandai error
         self.control_download(main_uid, 'stop')
         self.on_worker_error(main_uid, f"Part failed: {error_msg}")
 
-    def merge_files(self, item):
-        with self.merge_lock:
-            print(f"Merging files for {item.filename}...")
-            item.status = DownloadStatus.QUEUED # Status sementara: "Merging"
-            self.model_updated.emit()
-            try:
-                with open(item.filepath, 'wb') as dest_file:
-                    for i in range(item.splits):
-                        part_filepath = f"{item.filepath}.part{i}"
-                        if not os.path.exists(part_filepath):
-                            raise FileNotFoundError(f"Part file missing: {part_filepath}")
-                        with open(part_filepath, 'rb') as src_file:
-                            dest_file.write(src_file.read())
-                        os.remove(part_filepath) # Hapus part setelah digabung
-                
-                print(f"Merging complete for {item.filename}")
-                self.on_worker_status_changed(item.uid, DownloadStatus.FINISHED)
-                self.on_worker_finished(item.uid)
+    def finalize_split_download(self, item):
+        """Serahkan merge + verifikasi ke DownloadFinalizer; slot download langsung dibebaskan."""
+        task = self.active_downloads.pop(item.uid)
+        self._sample_task(task, final=True)
+        hash_chain = task.get('hash_chain')
+        algos = [item.checksum_algo] if item.checksum_algo else []
+        algos += [a for a in (item.server_digests or {}) if a not in algos]
+        item.segment_progress = None
+        item.finalize_progress = 0
+        self.reset_rate(item)
+        self.finalizing[item.uid] = item
+        self.item_updated.emit(item)
+        self.finalizer.submit(item.uid, item.filepath, [f"{item.filepath}.part{i}" for i in range(item.splits)],
+                              hash_chain, algos, item.checksum_algo, item.expected_checksum, item.server_digests)
+        self.start_next_in_queue()
+
+    @Slot(str, int)
+    def on_finalize_progress(self, uid, percent):
+        item = self.finalizing.get(uid)
+        if item is None: return
+        item.finalize_progress = percent
+        self.item_updated.emit(item)
 
-            except Exception as e:
-                print(f"Error merging files for {item.filename}: {e}")
-                self.on_worker_error(item.uid, f"Merge failed: {e}")
+    @Slot(str, str, str)
+    def on_finalize_finished(self, uid, checksum, error_message):
+        cancel = self.finalizer.cancel_events.pop(uid, None)
+        item = self.finalizing.pop(uid, None)
+        if item is None: return
+        item.finalize_progress = None
+        if checksum:
+            item.checksum = checksum
+            self.mark_dirty(item)
+        if cancel is not None and cancel.is_set():
+            self.on_worker_status_changed(uid, DownloadStatus.STOPPED)
+        elif error_message:
+            self.on_worker_error(uid, error_message)
+        else:
+            print(f"Finalized {item.filename}")
+            self.on_worker_status_changed(uid, DownloadStatus.FINISHED)
 
     # --- Slot-slot yang sudah ada, beberapa perlu sedikit modifikasi ---
 
+    def _is_current_worker(self, uid):
+        """False untuk sinyal dari worker run lama (item di-stop lalu di-retry atau dikembalikan ke antrian):
+        sinyal itu bisa masih di antrian event setelah task baru untuk uid yang sama dibuat."""
+        task = self.active_downloads.get(uid)
+        return task is not None and task['workers'].get(uid, {}).get('worker') is self.sender()
+
     @Slot(str, int)
     def on_worker_started(self, uid, total_size):
+        if not self._is_current_worker(uid): return
         item = self.get_item_by_uid(uid)
         if item:
             item.total_size = total_size
-            self.model_updated.emit()
+            self.mark_dirty(item)
             self.item_updated.emit(item)
-    @Slot(str, int)
-    def on_worker_progress(self, uid, downloaded_size):
-        item = self.get_item_by_uid(uid)
-        if not item: return
+    @Slot()
+    def sample_progress(self):
+        """Baca counter byte semua task aktif dengan laju tetap; sinyal worker hanya membawa perubahan state."""
+        now = time.monotonic()
+        for task in self.active_downloads.values():
+            if task['item'].status != DownloadStatus.PAUSED: self._sample_task(task, now)
+        self.allocate_bandwidth(now)
+
+    def _sample_task(self, task, now=None, final=False):
+        """`final`: sampel terakhir sebelum slot dilepas; hanya byte, tanpa estimator (sudah/akan di-reset)."""
+        counters = task.get('counters')
+        if counters is None: return # Masih probe, belum ada worker
+        item = task['item']
+        downloaded_size = sum(counters)
+        changed = downloaded_size != item.downloaded_size
+        lengths = task.get('lengths')
+        if lengths is not None and changed:
+            item.segment_progress = tuple(done / length if length > 0 else 1.0 for done, length in zip(counters, lengths))
         item.downloaded_size = downloaded_size
-        if item.total_size > 0: item.progress = int((downloaded_size / item.total_size) * 100)
-        current_time = time.time()
-        last_time, last_size = self.last_updates.get(uid, (current_time, downloaded_size))
-        time_diff = current_time - last_time
-        if time_diff >= 1:
-            size_diff = downloaded_size - last_size
-            speed_bps = size_diff / time_diff
-            item.speed = f"{format_size(speed_bps)}/s"
-            if speed_bps > 0 and item.total_size > 0:
-                remaining_bytes = item.total_size - downloaded_size
-                time_left_sec = remaining_bytes / speed_bps
-                mins, secs = divmod(time_left_sec, 60)
-                item.time_left = f"{int(mins)}m {int(secs)}s" if time_left_sec < 3600 else ">1h"
-            else: item.time_left = "N/A"
-            self.last_updates[uid] = (current_time, downloaded_size)
-        self.model_updated.emit()
-        self.item_updated.emit(item)
+        if changed:
+            self.mark_dirty(item)
+            if item.total_size > 0: item.progress = int((downloaded_size / item.total_size) * 100)
+        if final or item.status != DownloadStatus.DOWNLOADING: # Estimator hanya untuk item yang sedang transfer
+            if changed: self.item_updated.emit(item)
+            return
+        estimator = self.rate_estimators.get(item.uid)
+        if estimator is None: estimator = self.rate_estimators[item.uid] = TransferRateEstimator(self.speed_window_seconds)
+        if estimator.update(now if now is not None else time.monotonic(), downloaded_size) and estimator.speed_bps != item.speed_bps:
+            item.speed_bps = estimator.speed_bps
+            item.eta_seconds = estimator.eta(item.total_size - downloaded_size) if item.total_size > 0 else None
+            changed = True
+        if changed: self.item_updated.emit(item)
+    def reset_rate(self, item):
+        """Estimator dilepas begitu item berhenti transfer (selesai, pause, stop, error, merge)."""
+        self.rate_estimators.pop(item.uid, None)
+        item.speed_bps, item.eta_seconds = 0.0, None
+
     @Slot(str)
     def on_worker_finished(self, uid):
-        if uid in self.active_downloads: del self.active_downloads[uid]
+        if not self._is_current_worker(uid): return
+        task = self.active_downloads[uid]
+        self._sample_task(task, final=True) # Byte terakhir sebelum slot dilepas
+        del self.active_downloads[uid]
         self.start_next_in_queue()
     @Slot(str, str)
+    def on_worker_checksum(self, uid, digest):
+        if not self._is_current_worker(uid): return
+        item = self.get_item_by_uid(uid)
+        if item:
+            item.checksum = digest
+            self.mark_dirty(item)
+    # Slot sinyal worker single; on_worker_error/on_worker_status_changed juga dipanggil langsung oleh manager
+    @Slot(str, str)
+    def on_worker_failed(self, uid, error_message):
+        if self._is_current_worker(uid): self.on_worker_error(uid, error_message)
+    @Slot(str, DownloadStatus)
+    def on_worker_status(self, uid, status):
+        if not self._is_current_worker(uid): return
+        item = self.active_downloads[uid]['item']
+        # DOWNLOADING dari worker yang terkirim sesudah pause jangan menimpa PAUSED; resume ditetapkan manager
+        if status == DownloadStatus.DOWNLOADING and item.status == DownloadStatus.PAUSED: return
+        self.on_worker_status_changed(uid, status)
+
     def on_worker_error(self, uid, error_message):
         item = self.get_item_by_uid(uid)
         if item:
             print(f"Error for {uid}: {error_message}")
             item.status = DownloadStatus.ERROR
+            item.error_message = error_message
+            item.segment_progress = None
+            self.reset_rate(item)
+            self.mark_dirty(item)
+            self.item_updated.emit(item)
         if uid in self.active_downloads: del self.active_downloads[uid]
         self.start_next_in_queue()
         self.model_updated.emit()
-    @Slot(str, DownloadStatus)
     def on_worker_status_changed(self, uid, status):
         item = self.get_item_by_uid(uid)
         if item:
             item.status = status
+            if status != DownloadStatus.DOWNLOADING: self.reset_rate(item)
+            self.mark_dirty(item)
             if status == DownloadStatus.FINISHED:
                 self.download_finished_notification.emit(item.filename)
             self.model_updated.emit()
@@ -614,66 +2992,214 @@ class DownloadManager(QObject):
 
         active_task = self.active_downloads.get(uid)
         
-        if action in ['pause', 'resume', 'stop']:
-            if active_task:
+        if uid in self.finalizing: # Tidak ada koneksi lagi; hanya stop yang berarti
+            if action == 'stop': self.finalizer.cancel(uid)
+        elif action in ['pause', 'resume', 'stop']:
+            if active_task and active_task.get('probing'): # Belum ada worker; cukup lepaskan slot
+                if action == 'stop':
+                    del self.active_downloads[uid]
+                    self.on_worker_status_changed(uid, DownloadStatus.STOPPED)
+                    self.start_next_in_queue()
+            elif active_task:
                 for part_uid, part_info in active_task['workers'].items():
+                    if part_info.get('finished'): continue # Worker part sudah selesai dan dihapus
                     worker = part_info['worker']
-                    if action == 'stop': worker.stop()
-                    elif action in ['pause', 'resume']: worker.toggle_pause()
+                    try:
+                        if action == 'stop': worker.stop()
+                        elif action == 'pause': worker.pause()
+                        else: worker.resume()
+                    except RuntimeError: pass # Worker baru saja selesai; sinyal finished masih di antrian
+                if action == 'pause': self.on_worker_status_changed(uid, DownloadStatus.PAUSED)
+                elif action == 'resume': self.on_worker_status_changed(uid, DownloadStatus.DOWNLOADING)
+                if action == 'stop': # Manager pemilik slot: lepaskan sekarang, worker keluar sendiri
+                    self._sample_task(active_task, final=True)
+                    del self.active_downloads[uid]
+                    self.on_worker_status_changed(uid, DownloadStatus.STOPPED)
+                    self.start_next_in_queue()
             elif action == 'stop': # Jika di queue
                  if uid in self.download_queue: self.download_queue.remove(uid)
                  item.status = DownloadStatus.STOPPED
+                 self.mark_dirty(item)
+                 self.item_updated.emit(item)
                  self.model_updated.emit()
         
         elif action == 'retry' and item.status in [DownloadStatus.ERROR, DownloadStatus.STOPPED]:
             item.status = DownloadStatus.QUEUED
             item.retries = 0
+            item.error_message = ""
+            self.mark_dirty(item)
+            self.item_updated.emit(item)
             self.download_queue.insert(0, uid)
             self.start_next_in_queue()
 
-    def remove_download(self, uid, delete_file=False):
-        item_to_remove = None
-        row_index = -1
-        for i, item in enumerate(self.downloads):
-            if item.uid == uid:
-                item_to_remove = item
-                row_index = i
-                break
-        
-        if item_to_remove:
-            self.control_download(uid, 'stop')
+    # --- Verifikasi terhadap manifest (SHA256SUMS dll.) ---
+    def verify_against_manifest(self, manifest_path):
+        """Hash semua item FINISHED yang tercantum di manifest secara paralel.
 
-            # --- FIX CRASH: Safely signal the view about the removal ---
-            self.rows_about_to_be_removed.emit(QModelIndex(), row_index, row_index)
-            self.downloads.pop(row_index)
-            self.rows_removed.emit(QModelIndex(), row_index, row_index)
-            
-            if delete_file:
-                if os.path.exists(item_to_remove.filepath):
-                    try: os.remove(item_to_remove.filepath)
-                    except OSError as e: print(f"Failed to delete file {item_to_remove.filepath}: {e}")
-                # Hapus juga part files jika ada
-                for i in range(item_to_remove.splits):
-                    part_file = f"{item_to_remove.filepath}.part{i}"
-                    if os.path.exists(part_file):
-                        try: os.remove(part_file)
-                        except OSError as e: print(f"Failed to delete part file {part_file}: {e}")
+        Returns False jika verifikasi lain masih berjalan.
+        """
+        if self.manifest_thread is not None: return False
+        entries = parse_checksum_manifest(manifest_path)
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        path_key = lambda path: os.path.normcase(os.path.abspath(path))
+        finished_by_path = {} # {path: [uid]}, termasuk baris archive
+        for item in self.downloads:
+            if item.status == DownloadStatus.FINISHED:
+                finished_by_path.setdefault(path_key(item.filepath), []).append(item.uid)
+        for row, filepath in enumerate(self.archive.filepaths):
+            finished_by_path.setdefault(path_key(filepath), []).append(self.archive.uids[row])
+
+        self.manifest_jobs = {}
+        jobs = []
+        unmatched = 0
+        for filename, algo, digest in entries:
+            # Hanya file di folder manifest itu sendiri; file senama di folder lain bukan urusan manifest ini
+            path = os.path.join(manifest_dir, filename)
+            uids = finished_by_path.get(path_key(path), []) if os.path.exists(path) else []
+            if not uids: unmatched += 1
+            for uid in uids:
+                expected = self.manifest_jobs.setdefault(uid, [])
+                if (algo, digest) in expected: continue # Baris duplikat, cukup di-hash sekali
+                expected.append((algo, digest))
+                jobs.append((uid, path, algo))
+                self._set_verify_progress(uid, 0)
+        self.manifest_results = [0, 0, unmatched]
+        if not jobs:
+            self.manifest_verification_finished.emit(*self.manifest_results)
+            return True
+
+        thread = QThread()
+        verifier = ManifestVerifier(jobs)
+        verifier.moveToThread(thread)
+        thread.started.connect(verifier.run)
+        verifier.progress.connect(self.on_manifest_progress)
+        verifier.file_verified.connect(self.on_manifest_file_verified)
+        verifier.finished.connect(self.on_manifest_finished)
+        verifier.finished.connect(thread.quit)
+        verifier.finished.connect(verifier.deleteLater)
+        thread.finished.connect(self.on_manifest_thread_finished)
+        thread.finished.connect(thread.deleteLater)
+        self.manifest_thread = (thread, verifier)
+        self.model_updated.emit()
+        thread.start()
+        return True
+
+    def _set_verify_progress(self, uid, percent):
+        item = self.get_item_by_uid(uid)
+        if item: item.verify_progress = percent
+        elif percent is None: self.archive.verify_progress.pop(uid, None)
+        else: self.archive.verify_progress[uid] = percent
+
+    @Slot(str, int)
+    def on_manifest_progress(self, uid, percent):
+        self._set_verify_progress(uid, percent)
+        self.row_updated.emit(uid)
+
+    @Slot(str, str, str, str)
+    def on_manifest_file_verified(self, uid, algo, digest, error_message):
+        pending = self.manifest_jobs.get(uid, [])
+        expected = next((d for a, d in pending if a == algo and (error_message or d == digest)), None)
+        if expected is None: expected = next((d for a, d in pending if a == algo), None)
+        if expected is None: return # Item sudah di-antrekan ulang oleh baris lain
+        pending.remove((algo, expected))
+        if not pending or (not error_message and digest != expected): # Selesai, atau gagal: sisa baris tak relevan
+            self.manifest_jobs.pop(uid, None)
+            self._set_verify_progress(uid, None)
+        if error_message:
+            print(f"Could not verify {uid}: {error_message}")
+        elif digest == expected:
+            item = self.get_item_by_uid(uid)
+            if item:
+                item.checksum_algo, item.checksum, item.expected_checksum = algo, digest, expected
+            elif self.archive.row_of(uid) is not None:
+                row = self.archive.row_of(uid)
+                self.archive.checksum_algos[row], self.archive.checksums[row] = algo, digest
+                self.archive.expected_checksums[row] = expected
+            self.dirty_uids[uid] = None
+            self.manifest_results[0] += 1
+        else:
+            self.manifest_results[1] += 1
+            item = self.promote_archived(uid) # Baris archive harus jadi item live untuk di-download ulang
+            if item: self.requeue_corrupt_download(item, algo, expected, checksum_mismatch_message(algo, expected, digest))
+        self.row_updated.emit(uid)
+        self.model_updated.emit()
+
+    @Slot()
+    def on_manifest_finished(self):
+        for uid in self.manifest_jobs:
+            self._set_verify_progress(uid, None)
+            self.row_updated.emit(uid)
+        self.manifest_jobs = {}
+        self.model_updated.emit()
+        self.manifest_verification_finished.emit(*self.manifest_results)
+
+    @Slot()
+    def on_manifest_thread_finished(self):
+        # Referensi QThread dilepas setelah thread benar-benar berhenti
+        self.manifest_thread = None
+
+    def requeue_corrupt_download(self, item, algo, expected, reason):
+        """Hapus file yang rusak lalu antrekan ulang dengan checksum yang diharapkan."""
+        print(f"Re-queueing {item.filename}: {reason}")
+        if os.path.exists(item.filepath):
+            try: os.remove(item.filepath)
+            except OSError as e: print(f"Failed to delete file {item.filepath}: {e}")
+        item.checksum_algo, item.expected_checksum, item.checksum = algo, expected, ""
+        item.error_message = reason
+        item.status = DownloadStatus.QUEUED
+        item.downloaded_size, item.progress, item.retries = 0, 0, 0
+        self.mark_dirty(item)
+        if item.uid not in self.download_queue: self.download_queue.append(item.uid)
+        self.start_next_in_queue()
+
+    def remove_download(self, uid, delete_file=False): return self.remove_downloads([uid], delete_file)
+
+    def remove_downloads(self, uids, delete_files=False):
+        """Hapus banyak item sekaligus (live maupun archive).
+
+        Baris dikelompokkan menjadi range kontigu: satu pasang sinyal remove per
+        range, dikerjakan dari bawah supaya indeks di atasnya tetap valid. Jika
+        seleksi terlalu terpecah, daftar dipadatkan dalam satu lintasan di dalam
+        reset model. File dihapus di thread latar. Returns jumlah item terhapus.
+        """
+        uid_set = set(uids)
+        live_rows = sorted(row for row in map(self._live_row, uid_set) if row is not None)
+        archive_rows = sorted(row for row in map(self.archive.row_of, uid_set) if row is not None)
+        if not live_rows and not archive_rows: return 0
+        removed = [self.downloads[row].uid for row in live_rows] + [self.archive.uids[row] for row in archive_rows]
+        files = ([(self.downloads[row].filepath, self.downloads[row].splits) for row in live_rows] +
+                 [(self.archive.filepaths[row], self.archive.splits[row]) for row in archive_rows])
+        for row in live_rows:
+            uid = self.downloads[row].uid
+            if uid in self.active_downloads or uid in self.finalizing: self.control_download(uid, 'stop')
+        self.download_queue = [uid for uid in self.download_queue if uid not in uid_set]
+
+        offset = len(self.downloads)
+        ranges = contiguous_ranges(live_rows) + [(offset + a, offset + b) for a, b in contiguous_ranges(archive_rows)]
+        if len(ranges) > MAX_REMOVE_RANGES:
+            self.model_about_to_be_reset.emit()
+            self.downloads[:] = [item for item in self.downloads if item.uid not in uid_set] # List dipakai bersama model
+            self.archive.remove_rows(archive_rows)
+            self._live_rows = None
+            self.model_reset.emit()
+        else:
+            for first, last in reversed(ranges):
+                self.rows_about_to_be_removed.emit(QModelIndex(), first, last)
+                if first >= offset: self.archive.remove_range(first - offset, last - offset)
+                else: del self.downloads[first:last + 1]
+                self._live_rows = None
+                self.rows_removed.emit(QModelIndex(), first, last)
+        for uid in removed: self.archive.verify_progress.pop(uid, None)
+        self.deleted_uids.update(removed)
+        for uid in removed: self.dirty_uids.pop(uid, None)
+        if delete_files:
+            threading.Thread(target=delete_download_files, args=(files,), name="DownloadFileCleanup", daemon=True).start()
+        return len(removed)
 
     def clear_completed_downloads(self):
-        items_to_remove = [
-            (i, item) for i, item in enumerate(self.downloads)
-            if item.status in [DownloadStatus.FINISHED, DownloadStatus.ERROR, DownloadStatus.STOPPED]
-        ]
-        if not items_to_remove:
-            return
-            
-        # --- FIX CRASH: Iterate backwards and signal each removal safely ---
-        for i, item in reversed(items_to_remove):
-            self.rows_about_to_be_removed.emit(QModelIndex(), i, i)
-            self.downloads.pop(i)
-            self.rows_removed.emit(QModelIndex(), i, i)
-        
-        print(f"Cleared completed downloads. Kept {len(self.downloads)} active items.")
+        done = [DownloadStatus.FINISHED, DownloadStatus.ERROR, DownloadStatus.STOPPED]
+        removed = self.remove_downloads([item.uid for item in self.downloads if item.status in done] + self.archive.uids)
+        if removed: print(f"Cleared completed downloads. Kept {len(self.downloads)} active items.")
 
 
 # --- UI/UX Lainnya ---
@@ -707,6 +3233,20 @@ class AddDownloadDialog(QDialog):
         self.split_combo.addItems(["1", "2", "4", "8", "16"])
         self.split_combo.setToolTip("Jumlah koneksi paralel untuk mempercepat download.\nBeberapa server mungkin tidak mendukung ini.")
         form_layout.addRow("Connections:", self.split_combo)
+
+        # NEW: Checksum opsional, diverifikasi selama download berjalan
+        checksum_layout = QHBoxLayout()
+        self.checksum_algo_combo = QComboBox()
+        self.checksum_algo_combo.addItems(list(CHECKSUM_ALGORITHMS.keys()))
+        self.checksum_input = QLineEdit()
+        self.checksum_input.setPlaceholderText("Expected checksum (optional)")
+        checksum_layout.addWidget(self.checksum_algo_combo)
+        checksum_layout.addWidget(self.checksum_input)
+        form_layout.addRow("Checksum:", checksum_layout)
+
+        self.off_peak_check = QCheckBox("Start in off-peak window")
+        self.off_peak_check.setToolTip("Queue until the bandwidth schedule enters an off-peak period.")
+        form_layout.addRow("", self.off_peak_check)
         
         self.layout.addLayout(form_layout)
         
@@ -729,7 +3269,11 @@ class AddDownloadDialog(QDialog):
             self.url_input.text(), 
             self.path_input.text(), 
             self.category_input.currentText(), 
-            int(self.split_combo.currentText()) # Mengembalikan jumlah split
+            int(self.split_combo.currentText()), # Mengembalikan jumlah split
+            # Tanpa checksum yang diharapkan tidak ada yang di-hash
+            CHECKSUM_ALGORITHMS[self.checksum_algo_combo.currentText()] if self.checksum_input.text().strip() else None,
+            self.checksum_input.text().strip(),
+            self.off_peak_check.isChecked()
         )
 
 class SettingsDialog(QDialog):
@@ -752,16 +3296,38 @@ class SettingsDialog(QDialog):
         self.max_downloads_spin.setRange(1, 10)
         self.max_downloads_spin.setValue(self.settings.value("max_concurrent_downloads", 3, type=int))
         form_layout.addRow("Max Concurrent Downloads:", self.max_downloads_spin)
+        self.max_finalizations_spin = QSpinBox()
+        self.max_finalizations_spin.setRange(1, 4)
+        self.max_finalizations_spin.setValue(self.settings.value("max_concurrent_finalizations", DEFAULT_MAX_FINALIZATIONS, type=int))
+        self.max_finalizations_spin.setToolTip("Split downloads merged at the same time (takes effect after restart).")
+        form_layout.addRow("Max Concurrent Merges:", self.max_finalizations_spin)
         self.speed_limit_spin = QSpinBox()
         self.speed_limit_spin.setRange(0, 100000)
         self.speed_limit_spin.setSuffix(" KB/s (0=Unlimited)")
         self.speed_limit_spin.setValue(self.settings.value("speed_limit_kbps", 0, type=int))
+        self.speed_limit_spin.setToolTip("Shared by all running downloads, divided by priority (High/Normal/Low = 4/2/1).")
         form_layout.addRow("Global Speed Limit:", self.speed_limit_spin)
+        self.speed_window_spin = QSpinBox()
+        self.speed_window_spin.setRange(1, 60)
+        self.speed_window_spin.setSuffix(" s")
+        self.speed_window_spin.setValue(self.settings.value("speed_window_seconds", DEFAULT_SPEED_WINDOW_SECONDS, type=int))
+        form_layout.addRow("Speed Averaging Window:", self.speed_window_spin)
+        self.schedule_edit = QPlainTextEdit(self.settings.value("bandwidth_schedule", ""))
+        self.schedule_edit.setPlaceholderText("22:00-07:00 speed=unlimited off-peak\n"
+                                              "12:00-13:00 days=mon-fri paused\n"
+                                              "09:00-17:00 days=mon-fri speed=2048 max=2")
+        self.schedule_edit.setToolTip("One rule per line; the first matching rule wins, otherwise the global settings apply.\n"
+                                      "Options: days=mon-fri, speed=KB/s (0/unlimited), max=N, paused, off-peak.")
+        self.schedule_edit.setMaximumHeight(90)
+        form_layout.addRow("Bandwidth Schedule:", self.schedule_edit)
         
         # --- TAMBAHAN --- Opsi minimize to tray
         self.minimize_to_tray_check = QCheckBox()
         self.minimize_to_tray_check.setChecked(self.settings.value("minimize_to_tray", True, type=bool))
         form_layout.addRow("Minimize to tray on close:", self.minimize_to_tray_check)
+        self.show_segments_check = QCheckBox()
+        self.show_segments_check.setChecked(self.settings.value("show_segment_progress", True, type=bool))
+        form_layout.addRow("Show per-connection progress:", self.show_segments_check)
         self.start_with_windows_check = QCheckBox()
         if sys.platform == "win32":
             self.start_with_windows_check.setChecked(self.settings.value("start_with_windows", False, type=bool))
@@ -784,10 +3350,19 @@ class SettingsDialog(QDialog):
         directory = QFileDialog.getExistingDirectory(self, "Select Folder", self.path_input.text())
         if directory: self.path_input.setText(directory)
     def save_and_accept(self):
+        schedule_text = self.schedule_edit.toPlainText()
+        errors = BandwidthSchedule(schedule_text).errors
+        if errors:
+            QMessageBox.warning(self, "Invalid Schedule", "\n".join(errors))
+            return
+        self.settings.setValue("bandwidth_schedule", schedule_text)
         self.settings.setValue("default_download_path", self.path_input.text())
         self.settings.setValue("max_concurrent_downloads", self.max_downloads_spin.value())
+        self.settings.setValue("max_concurrent_finalizations", self.max_finalizations_spin.value())
         self.settings.setValue("speed_limit_kbps", self.speed_limit_spin.value())
+        self.settings.setValue("speed_window_seconds", self.speed_window_spin.value())
         self.settings.setValue("minimize_to_tray", self.minimize_to_tray_check.isChecked())
+        self.settings.setValue("show_segment_progress", self.show_segments_check.isChecked())
         start_with_windows = self.start_with_windows_check.isChecked()
         self.settings.setValue("start_with_windows", start_with_windows)
         if sys.platform == "win32":
@@ -808,22 +3383,32 @@ class MainWindow(QMainWindow):
         self.setup_ui()
         # --- FIX CRASH: Connect manager signals to the model ---
         self.manager.connect_model(self.source_model)
+        self.manager.history_loaded.connect(self.on_history_loaded)
         self.apply_stylesheet()
         self.manager.model_updated.connect(self.update_view)
+        self.manager.item_updated.connect(self.source_model.refresh_item)
+        self.manager.row_updated.connect(self.source_model.refresh_uid)
         self.setAcceptDrops(True)
         self.create_tray_icon()
         self.is_exiting = False
         self.manager.download_finished_notification.connect(self.show_download_complete_notification)
         self.manager.item_updated.connect(self.update_progress_dialog)
+        self.manager.manifest_verification_finished.connect(self.on_manifest_verification_finished)
+        self.manager.downloads_added.connect(self.on_downloads_added)
+        self.manager.schedule_profile_changed.connect(self.on_schedule_profile_changed)
+        # Jendela tampil dulu, riwayat menyusul dari thread latar
+        self.statusBar().showMessage("Loading download history...")
+        self.manager.load_downloads()
 
     def setup_settings(self):
         # ... (Tidak ada perubahan)
         self.settings = QSettings("MacanTech", "MacanDownloaderPro")
         if not self.settings.value("default_download_path"):
-            self.settings.setValue("default_download_path", os.path.join(os.path.expanduser("~"), "Downloads"))
+            self.settings.setValue("default_download_path", default_download_path(self.settings))
         config_dir = os.path.dirname(self.settings.fileName())
         os.makedirs(config_dir, exist_ok=True)
         self.settings.setValue("download_list_path", os.path.join(config_dir, "downloads.json"))
+        self.settings.setValue("download_db_path", os.path.join(config_dir, "downloads.db"))
 
     def setup_ui(self):
         # ... (Tidak ada perubahan signifikan, hanya penyesuaian kolom tabel)
@@ -832,11 +3417,22 @@ class MainWindow(QMainWindow):
         
         action_add = QAction(create_svg_icon(SVG_ADD_URL), "Add URL", self)
         action_add.triggered.connect(lambda: self.show_add_download_dialog())
+        action_import = QAction(create_svg_icon(SVG_IMPORT_LIST), "Import URL List", self)
+        action_import.triggered.connect(self.import_url_list)
+        action_paste = QAction("Paste URLs", self)
+        action_paste.setShortcut(QKeySequence.Paste) # QLineEdit yang fokus tetap menangani paste-nya sendiri
+        action_paste.triggered.connect(self.paste_urls)
+        self.addAction(action_paste)
 
         self.action_pause = QAction(create_svg_icon(SVG_PAUSE), "Pause Selected", self)
         self.action_pause.triggered.connect(self.pause_selected)
         self.action_pause.setEnabled(False)
 
+        self.action_remove = QAction(create_svg_icon(SVG_REMOVE), "Remove Selected", self)
+        self.action_remove.setShortcut(QKeySequence.Delete)
+        self.action_remove.triggered.connect(self.remove_selected)
+        self.action_remove.setEnabled(False)
+
         self.action_stop = QAction(create_svg_icon(SVG_STOP), "Stop Selected", self)
         self.action_stop.triggered.connect(self.stop_selected)
         self.action_stop.setEnabled(False)
@@ -844,6 +3440,9 @@ class MainWindow(QMainWindow):
         self.action_stop_all = QAction(create_svg_icon(SVG_STOP_ALL, "orange"), "Stop All", self)
         self.action_stop_all.triggered.connect(self.stop_all)
 
+        action_verify = QAction(create_svg_icon(SVG_VERIFY), "Verify Against Manifest...", self)
+        action_verify.triggered.connect(self.verify_against_manifest)
+
         action_settings = QAction(create_svg_icon(SVG_SETTINGS), "Settings", self)
         action_settings.triggered.connect(self.show_settings_dialog)
         
@@ -851,13 +3450,26 @@ class MainWindow(QMainWindow):
         action_about.triggered.connect(self.show_about_dialog)
         
         toolbar.addAction(action_add)
+        toolbar.addAction(action_import)
         toolbar.addSeparator()
         toolbar.addAction(self.action_pause)
         toolbar.addAction(self.action_stop)
         toolbar.addAction(self.action_stop_all)
+        toolbar.addAction(self.action_remove)
+        toolbar.addAction(action_verify)
         toolbar.addSeparator()
         toolbar.addAction(action_settings)
         toolbar.addAction(action_about)
+        toolbar.addSeparator()
+
+        # Kebijakan antrian: langsung berlaku untuk slot berikutnya yang kosong
+        toolbar.addWidget(QLabel(" Queue: "))
+        self.policy_combo = QComboBox(self)
+        for key, policy_class in QUEUE_POLICIES.items(): self.policy_combo.addItem(policy_class.label, key)
+        self.policy_combo.setCurrentIndex(self.policy_combo.findData(self.manager.config.queue_policy))
+        self.policy_combo.setToolTip("Order in which queued downloads are started.")
+        self.policy_combo.currentIndexChanged.connect(lambda: self.manager.set_queue_policy(self.policy_combo.currentData()))
+        toolbar.addWidget(self.policy_combo)
         
         spacer = QWidget()
         spacer.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -871,6 +3483,10 @@ class MainWindow(QMainWindow):
         self.search_input.setPlaceholderText("Search from list...")
         self.search_input.setMaximumWidth(250)
         self.search_input.textChanged.connect(self.on_search_text_changed)
+        self.search_timer = QTimer(self) # Debounce: filter baru dijalankan setelah user berhenti mengetik
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.apply_search_filter)
         toolbar.addWidget(self.search_input)
 
         central_widget = QWidget()
@@ -880,17 +3496,25 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Horizontal)
         self.sidebar = QListWidget()
         self.sidebar.setFixedWidth(200)
-        self.sidebar.addItems(["All", "Downloading", "Paused", "Finished", "Error"])
+        for status in ["All", "Downloading", "Finalizing", "Paused", "Finished", "Error"]:
+            entry = QListWidgetItem(status)
+            entry.setData(Qt.UserRole, status) # Teks entry ikut berisi jumlah
+            self.sidebar.addItem(entry)
         self.sidebar.currentItemChanged.connect(self.filter_downloads)
         splitter.addWidget(self.sidebar)
         self.table_view = QTableView()
-        self.source_model = DownloadTableModel(self.manager.downloads)
+        self.source_model = DownloadTableModel(self.manager.downloads, self.manager.archive)
         
+        self.source_model.decorations_changed.connect(self.table_view.viewport().update)
+        self.manager.history_loaded.connect(self.source_model.reconcile_files)
         self.proxy_model = CustomFilterProxyModel(self)
+        self.proxy_model.status_counts_changed.connect(self.update_sidebar_counts)
         self.proxy_model.setSourceModel(self.source_model)
         
         self.table_view.setModel(self.proxy_model)
-        self.table_view.setItemDelegateForColumn(2, ProgressBarDelegate(self))
+        self.progress_delegate = ProgressBarDelegate(self, self.settings.value("show_segment_progress", True, type=bool))
+        self.table_view.setItemDelegateForColumn(2, self.progress_delegate)
+        self.table_view.setItemDelegateForColumn(9, SparklineDelegate(self))
         self.table_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table_view.setColumnHidden(6, True)
         self.table_view.verticalHeader().setVisible(False)
@@ -906,6 +3530,11 @@ class MainWindow(QMainWindow):
         splitter.addWidget(self.table_view)
         splitter.setSizes([150, 850])
         main_layout.addWidget(splitter)
+        self.total_graph = ThroughputGraph(self, self.manager.total_throughput, show_label=False)
+        self.total_graph.setFixedWidth(160)
+        self.total_graph.setToolTip("Total throughput")
+        self.statusBar().addPermanentWidget(self.total_graph)
+        self.manager.throughput_sampled.connect(self.on_throughput_sampled)
         self.statusBar().showMessage("Ready")
 
     def get_selected_items(self):
@@ -914,10 +3543,28 @@ class MainWindow(QMainWindow):
         selected_indexes = self.table_view.selectionModel().selectedRows()
         for proxy_index in selected_indexes:
             source_index = self.proxy_model.mapToSource(proxy_index)
-            item = self.manager.downloads[source_index.row()]
+            item = self.manager.item_at(source_index.row())
             items.append(item)
         return items
 
+    def get_selected_uids(self):
+        """uid baris terpilih tanpa membuat DownloadItem untuk baris archive."""
+        return [self.manager.uid_at(self.proxy_model.mapToSource(proxy_index).row())
+                for proxy_index in self.table_view.selectionModel().selectedRows()]
+
+    def remove_selected(self):
+        uids = self.get_selected_uids()
+        if not uids: return
+        box = QMessageBox(QMessageBox.Question, "Remove Downloads",
+                          f"Remove {len(uids)} selected download(s) from the list?", QMessageBox.Cancel, self)
+        remove_button = box.addButton("Remove", QMessageBox.AcceptRole)
+        delete_button = box.addButton("Remove and Delete Files", QMessageBox.DestructiveRole)
+        box.exec()
+        if box.clickedButton() in (remove_button, delete_button):
+            self.table_view.clearSelection()
+            removed = self.manager.remove_downloads(uids, delete_files=box.clickedButton() is delete_button)
+            self.statusBar().showMessage(f"Removed {removed} download(s).", 3000)
+
     def pause_selected(self):
         # ... (Tidak ada perubahan)
         items = self.get_selected_items()
@@ -957,22 +3604,48 @@ class MainWindow(QMainWindow):
             item for item in self.manager.downloads 
             if item.status in [DownloadStatus.FINISHED, DownloadStatus.ERROR, DownloadStatus.STOPPED]
         ]
-        if not items_to_clear:
+        clear_count = len(items_to_clear) + len(self.manager.archive)
+        if not clear_count:
             self.statusBar().showMessage("No completed downloads to clear.", 3000)
             return
         reply = QMessageBox.question(self, 'Confirm Clear',
-            f"Are you sure you want to remove {len(items_to_clear)} completed/stopped/error item(s) from the list?",
+            f"Are you sure you want to remove {clear_count} completed/stopped/error item(s) from the list?",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.table_view.clearSelection() 
             self.manager.clear_completed_downloads()
             self.statusBar().showMessage("Completed downloads cleared.", 3000)
 
+    @Slot(int)
+    def on_history_loaded(self, count):
+        self.statusBar().showMessage(f"Ready - {count} download(s) in list", 3000)
+
+    def verify_against_manifest(self):
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Checksum Manifest", self.settings.value("default_download_path", ""),
+            "Checksum manifests (*SUMS* *.sha256 *.sha1 *.md5 *.txt);;All files (*)")
+        if not manifest_path: return
+        try:
+            started = self.manager.verify_against_manifest(manifest_path)
+        except (OSError, UnicodeError) as e:
+            QMessageBox.warning(self, "Error", f"Could not read the manifest:\n{manifest_path}\n\nReason: {e}")
+            return
+        if not started:
+            self.statusBar().showMessage("A manifest verification is already running.", 3000)
+            return
+        self.statusBar().showMessage(f"Verifying against {os.path.basename(manifest_path)}...")
+
+    @Slot(int, int, int)
+    def on_manifest_verification_finished(self, ok_count, bad_count, unmatched_count):
+        self.statusBar().showMessage(
+            f"Manifest verification: {ok_count} OK, {bad_count} mismatched (re-queued), "
+            f"{unmatched_count} not found in list.", 10000)
+
     def on_table_double_clicked(self, proxy_index):
         # ... (Tidak ada perubahan)
         if not proxy_index.isValid(): return
         source_index = self.proxy_model.mapToSource(proxy_index)
-        item = self.manager.downloads[source_index.row()]
+        item = self.manager.item_at(source_index.row())
         if item.status == DownloadStatus.FINISHED:
             if os.path.exists(item.filepath):
                 try:
@@ -989,45 +3662,56 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def on_search_text_changed(self):
-        # ... (Tidak ada perubahan)
+        self.search_timer.start()
+
+    @Slot()
+    def apply_search_filter(self):
         search_text = self.search_input.text()
         self.proxy_model.set_text_filter(search_text)
 
+    @Slot(object)
+    def update_sidebar_counts(self, counts):
+        for i in range(self.sidebar.count()):
+            entry = self.sidebar.item(i)
+            status = entry.data(Qt.UserRole)
+            count = sum(counts.values()) if status == "All" else counts.get(status, 0)
+            entry.setText(f"{status} ({count})")
+
     @Slot()
     def update_toolbar_actions_state(self):
-        # ... (Tidak ada perubahan)
-        selected_items = self.get_selected_items()
-        can_pause = False
-        can_stop = False
-        if selected_items:
-            can_pause = any(item.status in [DownloadStatus.DOWNLOADING, DownloadStatus.PAUSED] for item in selected_items)
-            can_stop = any(item.status in [DownloadStatus.DOWNLOADING, DownloadStatus.PAUSED, DownloadStatus.QUEUED] for item in selected_items)
+        # Status dibaca langsung dari model; baris archive tidak perlu di-materialize
+        statuses = {self.source_model.filter_fields(self.proxy_model.mapToSource(proxy_index).row())[2]
+                    for proxy_index in self.table_view.selectionModel().selectedRows()}
+        can_pause = bool(statuses & {DownloadStatus.DOWNLOADING.value, DownloadStatus.PAUSED.value})
+        can_stop = bool(statuses & {DownloadStatus.DOWNLOADING.value, DownloadStatus.PAUSED.value, DownloadStatus.QUEUED.value, "Finalizing"})
         self.action_pause.setEnabled(can_pause)
         self.action_stop.setEnabled(can_stop)
+        self.action_remove.setEnabled(bool(statuses))
 
     def show_add_download_dialog(self, url=""):
-        default_path = self.settings.value("default_download_path")
+        default_path = default_download_path(self.settings)
         dialog = AddDownloadDialog(self, default_path, url)
         if dialog.exec():
             # Sekarang menerima `splits`
-            url, path, category, splits = dialog.get_data()
+            url, path, category, splits, checksum_algo, expected_checksum, off_peak = dialog.get_data()
             if url and path:
                 if not os.path.exists(path): os.makedirs(path, exist_ok=True)
                 filename = os.path.basename(urlparse(url).path) or "download"
                 filepath = os.path.join(path, filename)
-                item = self.manager.add_download(url, filepath, category, splits)
+                item = self.manager.add_download(url, filepath, category, splits, checksum_algo, expected_checksum, off_peak)
                 self.show_download_progress_dialog(item)
 
     @Slot()
     def update_view(self):
-        # ... (Tidak ada perubahan)
-        self.source_model.layoutChanged.emit()
+        # Perubahan per baris sudah lewat dataChanged (refresh_item); layoutChanged di sini
+        # akan memaksa proxy mengurutkan ulang seluruh tabel.
+        self.table_view.viewport().update()
         self.update_toolbar_actions_state()
 
     def filter_downloads(self, current, previous):
         # ... (Tidak ada perubahan)
         if not current: return
-        category = current.text()
+        category = current.data(Qt.UserRole)
         self.proxy_model.set_status_filter(category)
         self.statusBar().showMessage(f"View: {category}")
 
@@ -1053,7 +3737,7 @@ class MainWindow(QMainWindow):
         if not proxy_index.isValid(): return
         
         source_index = self.proxy_model.mapToSource(proxy_index)
-        item = self.manager.downloads[source_index.row()]
+        item = self.manager.item_at(source_index.row())
         menu = QMenu()
 
         if item.status == DownloadStatus.DOWNLOADING:
@@ -1075,14 +3759,44 @@ class MainWindow(QMainWindow):
         remove_from_list = remove_menu.addAction("From List")
         remove_and_delete = remove_menu.addAction("From List and Delete File")
         remove_action.setMenu(remove_menu)
-        remove_from_list.triggered.connect(partial(self.manager.remove_download, item.uid, delete_file=False))
-        remove_and_delete.triggered.connect(partial(self.manager.remove_download, item.uid, delete_file=True))
+        # Klik kanan di dalam seleksi -> berlaku untuk semua baris terpilih
+        selected_uids = self.get_selected_uids()
+        uids = selected_uids if item.uid in selected_uids else [item.uid]
+        if len(uids) > 1: remove_action.setText(f"Remove {len(uids)} Selected")
+        remove_from_list.triggered.connect(partial(self.manager.remove_downloads, uids, delete_files=False))
+        remove_and_delete.triggered.connect(partial(self.manager.remove_downloads, uids, delete_files=True))
+        if item.status != DownloadStatus.FINISHED:
+            off_peak_action = menu.addAction("Off-Peak Only")
+            off_peak_action.setCheckable(True)
+            off_peak_action.setChecked(item.off_peak)
+            off_peak_action.triggered.connect(partial(self.manager.set_off_peak, uids))
+            deadline_action = menu.addAction("Set Deadline...")
+            deadline_action.triggered.connect(partial(self.set_deadline_for, item, uids))
+            priority_menu = menu.addMenu("Priority")
+            for name, weight in PRIORITY_WEIGHTS.items():
+                priority_action = priority_menu.addAction(name)
+                priority_action.setCheckable(True)
+                priority_action.setChecked(item.priority == weight)
+                priority_action.triggered.connect(partial(self.manager.set_priority, uids, weight))
         
         if item.status == DownloadStatus.FINISHED:
             open_folder_action = menu.addAction("Open Containing Folder")
             open_folder_action.triggered.connect(partial(self.open_item_folder, item))
+        if item.checksum:
+            copy_checksum_action = menu.addAction(f"Copy Checksum ({item.checksum_algo})")
+            copy_checksum_action.triggered.connect(lambda: QApplication.clipboard().setText(item.checksum))
         menu.exec(self.table_view.viewport().mapToGlobal(pos))
     
+    def set_deadline_for(self, item, uids):
+        current = datetime.fromtimestamp(item.deadline).strftime("%Y-%m-%d %H:%M") if item.deadline is not None else ""
+        text, ok = QInputDialog.getText(self, "Set Deadline", "Deadline (YYYY-MM-DD HH:MM, empty to clear):", text=current)
+        if not ok: return
+        try: deadline = datetime.fromisoformat(text.strip()).timestamp() if text.strip() else None
+        except ValueError:
+            self.statusBar().showMessage(f"Invalid deadline: {text}", 5000)
+            return
+        self.manager.set_deadline(uids, deadline)
+
     # --- Dialog Progres & Tray Icon (Tidak ada perubahan besar) ---
     def show_download_progress_dialog(self, item):
         if item.uid in self.progress_dialogs:
@@ -1093,9 +3807,23 @@ class MainWindow(QMainWindow):
         dialog = DownloadProgressDialog(item, self)
         dialog.pause_resume_requested.connect(self._on_dialog_pause_resume_request)
         dialog.finished.connect(lambda: self.progress_dialogs.pop(item.uid, None))
+        if dialog.layout() is not None: # Grafik throughput ditempel di bawah isi dialog
+            graph = ThroughputGraph(dialog, item.throughput)
+            graph.setMinimumHeight(90)
+            dialog.layout().addWidget(graph)
+            dialog.throughput_graph = graph
         self.progress_dialogs[item.uid] = dialog
         dialog.show()
 
+    @Slot()
+    def on_throughput_sampled(self):
+        self.total_graph.update()
+        for uid, dialog in self.progress_dialogs.items():
+            graph = getattr(dialog, 'throughput_graph', None)
+            if graph is not None:
+                item = self.manager.get_item_by_uid(uid)
+                graph.set_history(item.throughput if item else None)
+
     @Slot(object)
     def update_progress_dialog(self, item):
         if item.uid in self.progress_dialogs:
@@ -1116,7 +3844,10 @@ class MainWindow(QMainWindow):
 
     def show_settings_dialog(self):
         dialog = SettingsDialog(self.settings, self)
-        dialog.exec()
+        if dialog.exec():
+            self.manager.apply_settings()
+            self.progress_delegate.show_segments = self.settings.value("show_segment_progress", True, type=bool)
+            self.table_view.viewport().update()
         
     def show_about_dialog(self):        
         title = "About Macan Download Manager Pro"        
@@ -1143,9 +3874,50 @@ class MainWindow(QMainWindow):
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls(): event.acceptProposedAction()
     def dropEvent(self, event):
+        urls, list_files, skipped = [], [], 0
         for url in event.mimeData().urls():
-            self.show_add_download_dialog(url.toString())
-            break
+            if not url.isLocalFile(): urls.append(url.toString())
+            elif url.toLocalFile().lower().endswith(URL_LIST_EXTENSIONS): list_files.append(url.toLocalFile()) # Daftar URL
+            else: skipped += 1 # File lain (ISO, video, ...) bukan daftar URL; jangan dibaca
+        if not urls and not list_files and not skipped and event.mimeData().hasText(): urls = extract_urls(event.mimeData().text())
+        if skipped and not urls and not list_files:
+            self.statusBar().showMessage("Only .txt URL lists can be dropped as files.", 5000)
+        for path in list_files: self.manager.add_downloads([], list_path=path)
+        self.add_urls(urls)
+
+    def add_urls(self, urls):
+        """Satu URL -> dialog Add seperti biasa; banyak URL -> add_downloads() ke folder default."""
+        if len(urls) == 1:
+            self.show_add_download_dialog(urls[0])
+            return
+        if not urls: return
+        folder = default_download_path(self.settings)
+        reply = QMessageBox.question(self, "Add Downloads", f"Add {len(urls)} downloads to:\n{folder}?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply == QMessageBox.Yes:
+            self.statusBar().showMessage(f"Adding {len(urls)} downloads...")
+            self.manager.add_downloads([{'url': url} for url in urls])
+
+    @Slot()
+    def paste_urls(self):
+        urls = extract_urls(QApplication.clipboard().text())
+        if urls: self.add_urls(urls)
+        else: self.statusBar().showMessage("No URLs found in clipboard.", 3000)
+
+    @Slot()
+    def import_url_list(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import URL List", "", "Text Files (*.txt);;All Files (*)")
+        if path:
+            self.statusBar().showMessage("Importing URL list...")
+            self.manager.add_downloads([], list_path=path)
+
+    @Slot(int)
+    def on_downloads_added(self, count):
+        self.statusBar().showMessage(f"Added {count} downloads." if count else "No downloads were added.", 5000)
+
+    @Slot(str)
+    def on_schedule_profile_changed(self, rule_text):
+        self.statusBar().showMessage(f"Schedule: {rule_text}" if rule_text else "Schedule: global settings", 5000)
 
     @Slot(str)
     def show_download_complete_notification(self, filename):
@@ -1213,7 +3985,8 @@ class MainWindow(QMainWindow):
             if item.status in [DownloadStatus.DOWNLOADING, DownloadStatus.PAUSED]:
                 self.manager.control_download(item.uid, 'stop')
         
-        self.manager.save_downloads()
+        self.manager.close_store()
+        self.source_model.shutdown()
         self.tray_icon.hide()
         print("Downloads saved. Exiting.")
         event.accept()
@@ -1248,6 +4021,7 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # Build frozen (PyInstaller): proses spawn ManifestVerifier tidak membuka jendela baru
     app = QApplication(sys.argv)
     window = MainWindow()
     